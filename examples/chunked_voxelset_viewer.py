@@ -0,0 +1,73 @@
+from argparse import ArgumentParser
+from typing import Optional
+
+import polyscope.imgui as psim
+
+from ps_utils.viewer.base_viewer import BaseViewer
+from ps_utils.structures import ChunkedVoxelSet
+from ps_utils.io import load_array
+from examples.utils.voxelize import upsample_voxels
+
+VOXEL_PATH = "data/bunny_voxels.npy"
+VOXEL_RES = 32
+
+
+class ChunkedVoxelSetViewer(BaseViewer):
+    """
+    Demo viewer showcasing large voxel sets split into bricks
+    """
+
+    def pre_init(
+        self,
+        factor: int = 8,
+        brick_size: int = 32,
+        mesh_path: Optional[str] = None,
+        **kwargs,
+    ):
+        self.factor = factor
+        self.brick_size = brick_size
+        self.mesh_path = mesh_path
+
+    def post_init(self, **kwargs):
+        # Load voxel coordinates (computed once from `mesh_path` with the asset cache)
+        if self.mesh_path is not None:
+            from examples.utils.asset_cache import cached_voxels
+
+            voxel_coords = cached_voxels(self.mesh_path, resolution=VOXEL_RES)
+        else:
+            voxel_coords, _ = load_array(VOXEL_PATH)
+        # Upsample them to get a large set
+        voxel_coords = upsample_voxels(voxel_coords, self.factor)
+
+        # Create a chunked voxel set
+        self.voxel_set = ChunkedVoxelSet(
+            voxel_coords,
+            VOXEL_RES * self.factor,
+            -1.0,
+            1.0,
+            brick_size=self.brick_size,
+        )
+
+    def gui(self):
+        # Just calling super to get FPS
+        super().gui()
+
+        psim.Text(f"Voxels: {self.voxel_set.num_voxels}")
+        psim.Text("Press `Alt` to add/remove voxels from the selection.")
+        psim.Text(
+            "Maintain `Alt` pressed and scroll to change the radius of the selection."
+        )
+
+        self.voxel_set.gui()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument("--factor", type=int, default=8)
+    parser.add_argument("--brick_size", type=int, default=32)
+    parser.add_argument("--mesh_path", type=str, default=None)
+    args = parser.parse_args()
+
+    ChunkedVoxelSetViewer(
+        factor=args.factor, brick_size=args.brick_size, mesh_path=args.mesh_path
+    )
@@ -1,6 +1,9 @@
+import os
+
 from ps_utils.viewer.base_viewer import BaseViewer
 from ps_utils.ui.save_utils import check_extension, BASIC_IMAGE_EXTENSIONS
-from ps_utils.ui.image_utils import Thumbnail
+from ps_utils.ui.thumbnail_cache import ThumbnailCache
+from ps_utils.ui.gallery import ImageGallery
 
 
 class DragViewer(BaseViewer):
@@ -9,23 +12,49 @@ class DragViewer(BaseViewer):
     """
 
     def post_init(self, **kwargs):
+        # Dropping an image again (if unchanged) doesn't decode it again
+        self.thumbnails = ThumbnailCache()
+        self.thumbnail_path = None
         self.thumbnail = None
 
+        # Dropped folders are displayed in a gallery, click on a tile to preview it
+        self.gallery = ImageGallery(on_select=self.select_image)
+
+    def select_image(self, input_path) -> bool:
+        try:
+            self.thumbnail = self.thumbnails.get(input_path)
+            self.thumbnail_path = input_path
+            return True
+        except Exception as e:
+            print(f"Couldn't load image at: {input_path}")
+            return False
+
     def gui(self):
         # Just calling super to get FPS
         super().gui()
 
+        # Only get the thumbnail again if it was evicted (no file access every frame)
+        if (
+            self.thumbnail_path is not None
+            and self.thumbnail_path not in self.thumbnails
+        ):
+            if not self.select_image(self.thumbnail_path):
+                # E.g., the file was deleted or renamed
+                self.thumbnail_path = None
+                self.thumbnail = None
         if self.thumbnail is not None:
             self.thumbnail.gui()
 
+        self.gallery.gui()
+
     def ps_drop_callback(self, input_path):
+        if os.path.isdir(input_path):
+            # Only lists the folder, images are loaded when visible
+            self.gallery.set_folder(input_path)
         # Check valid image extensions
-        if check_extension(input_path, BASIC_IMAGE_EXTENSIONS):
-            try:
-                # Load thumbnail object
-                self.thumbnail = Thumbnail.from_path(input_path)
-            except Exception as e:
-                print(f"Couldn't load image at: {input_path}")
+        elif check_extension(input_path, BASIC_IMAGE_EXTENSIONS):
+            # Load thumbnail object (in the background)
+            self.select_image(input_path)
         else:
             print(f"Can only load images with extensions: {BASIC_IMAGE_EXTENSIONS}")
 
@@ -1,5 +1,6 @@
 from collections import defaultdict
 from PIL import Image
+import time
 
 import numpy as np
 import trimesh
@@ -9,16 +10,25 @@ import polyscope as ps
 import polyscope.imgui as psim
 
 from ps_utils.viewer.base_viewer import BaseViewer
+from ps_utils.viewer.render_target import RenderTarget
 
 MESH_PATH = "data/bunny.obj"
 RENDER_SIZE = 512
 LIGHT_INTENSITY = 8.0
 
+# Progressive rendering
+PREVIEW_FACTOR = 4  # Resolution divider while the camera moves
+TILE_SIZE = 128  # Full-resolution tiles rendered once the camera settled
+TILE_BUDGET_MS = 8.0  # Time spent rendering tiles every frame
+
 
 class GlViewer(BaseViewer):
     """
     Demo viewer showcasing OpenGL viewer
     NB: a copy is made from GPU -> CPU to update the buffer. This could be improved...
+    Frames are only rendered when polyscope's camera or the scene changed.
+    In progressive mode, changes are first rendered at low resolution, then refined with
+    full-resolution tiles spread across frames within `TILE_BUDGET_MS`.
     """
 
     def reset(self):
@@ -30,16 +40,8 @@ class GlViewer(BaseViewer):
         self.renderer = pyrender.OffscreenRenderer(RENDER_SIZE, RENDER_SIZE)
 
     def init_render_buffer(self):
-
-        self.render_buffer_quantity = ps.add_raw_color_alpha_render_image_quantity(
-            "render_buffer",
-            np.ones((RENDER_SIZE, RENDER_SIZE), dtype=float),
-            np.ones((RENDER_SIZE, RENDER_SIZE, 4), dtype=float),
-            enabled=True,
-            allow_fullscreen_compositing=True,
-        )
-
-        self.render_buffer = ps.get_quantity_buffer("render_buffer", "colors")
+        # Persistent float32 RGBA storage, renders are converted into it
+        self.render_target = RenderTarget("render_buffer", RENDER_SIZE, RENDER_SIZE)
 
     def pre_init(self, **kwargs):
         # Initialize renderer and scene
@@ -58,29 +60,182 @@ class GlViewer(BaseViewer):
         )
         self.scene.add(self.mesh)
 
-        # 3. Prepare camera
+        # 3. Prepare camera (synced with polyscope's view in `sync_camera`)
         camera_parameters = ps.get_view_camera_parameters()
-        cam = pyrender.PerspectiveCamera(
+        self.cam = pyrender.PerspectiveCamera(
             yfov=np.deg2rad(camera_parameters.get_fov_vertical_deg()),
             aspectRatio=camera_parameters.get_aspect(),
         )
+        # NB: the pose is camera-to-world, i.e., the inverse of the view matrix
+        pose = np.linalg.inv(camera_parameters.get_view_mat())
+        self.cam_node = self.scene.add(self.cam, pose=pose)
 
-        self.cam_node = self.scene.add(cam, pose=camera_parameters.get_E())
-
-        # 4. Add light
+        # 4. Add light (following the camera)
         light = pyrender.DirectionalLight(color=np.ones(3), intensity=LIGHT_INTENSITY)
-        self.scene.add(light, pose=camera_parameters.get_E())
+        self.light_node = self.scene.add(light, pose=pose)
+
+        # 5. Render-on-change: only render when the camera or the scene changed.
+        # Call `self.mark_scene_dirty()` after editing the scene
+        self.render_on_change = True
+        self.scene_version = 0
+        self.camera_version = 0
+        self.last_camera = None
+        self.rendered_versions = None
+        self.num_renders = 0
+
+        # 6. Progressive rendering: tiles use the same camera with a shifted principal point
+        self.progressive = True
+        self.tile_cam = pyrender.IntrinsicsCamera(
+            fx=1.0, fy=1.0, cx=0.0, cy=0.0, znear=self.cam.znear, zfar=self.cam.zfar
+        )
+        self.tile_cam_node = self.scene.add(self.tile_cam, pose=pose)
+        self.scene.main_camera_node = self.cam_node
+        self.pending_tiles = []
+        self.tile_ms = 0.0
 
     def gui(self):
         # Just calling super to get FPS
         super().gui()
 
-    def draw(self):
-        color, depth = self.renderer.render(self.scene, flags=pyrender.RenderFlags.RGBA)
-        color = color.astype(float) / 255.0
-        color = color.reshape(-1, 4)
+        _, self.render_on_change = psim.Checkbox(
+            "Render on change##gl_viewer", self.render_on_change
+        )
+        clicked, self.progressive = psim.Checkbox(
+            "Progressive##gl_viewer", self.progressive
+        )
+        if clicked:
+            # Render from scratch in the new mode
+            self.rendered_versions = None
+        psim.Text(f"Renders: {self.num_renders}")
+        if self.progressive:
+            psim.Text(f"Pending tiles: {len(self.pending_tiles)}")
+        self.render_target.gui()
+
+    def mark_scene_dirty(self):
+        self.scene_version += 1
+
+    def sync_camera(self):
+        """
+        Bumps `camera_version` and updates the camera/light nodes if polyscope's view changed.
+        """
+        camera_parameters = ps.get_view_camera_parameters()
+        view_mat = camera_parameters.get_view_mat()
+        fov = camera_parameters.get_fov_vertical_deg()
+        aspect = camera_parameters.get_aspect()
+
+        if self.last_camera is not None:
+            last_view_mat, last_fov, last_aspect = self.last_camera
+            if (
+                np.array_equal(view_mat, last_view_mat)
+                and fov == last_fov
+                and aspect == last_aspect
+            ):
+                return
+        self.last_camera = (view_mat, fov, aspect)
+        self.camera_version += 1
+
+        pose = np.linalg.inv(view_mat)
+        self.scene.set_pose(self.cam_node, pose=pose)
+        self.scene.set_pose(self.light_node, pose=pose)
+        self.scene.set_pose(self.tile_cam_node, pose=pose)
+        self.cam.yfov = np.deg2rad(fov)
+        self.cam.aspectRatio = aspect
+
+        # Focal lengths (in pixels) matching the perspective camera at full resolution
+        tan_half_fov = np.tan(0.5 * self.cam.yfov)
+        self.tile_cam.fx = RENDER_SIZE / (2.0 * aspect * tan_half_fov)
+        self.tile_cam.fy = RENDER_SIZE / (2.0 * tan_half_fov)
+
+    def render(self, width, height):
+        # NB: resizing the viewport is cheaper than a renderer (i.e., GL context) per size
+        if (self.renderer.viewport_width, self.renderer.viewport_height) != (
+            width,
+            height,
+        ):
+            self.renderer.viewport_width = width
+            self.renderer.viewport_height = height
+        color, _ = self.renderer.render(self.scene, flags=pyrender.RenderFlags.RGBA)
+        return color
+
+    def render_preview(self):
+        size = RENDER_SIZE // PREVIEW_FACTOR
+        color = self.render(size, size)
+        # Nearest upsampling straight into the storage
+        np.multiply(
+            color[:, None, :, None],
+            1.0 / 255.0,
+            out=self.render_target.colors.reshape(
+                size, PREVIEW_FACTOR, size, PREVIEW_FACTOR, 4
+            ),
+        )
 
-        self.render_buffer.update_data_from_host(color)
+        # Refine from the center
+        tiles = [
+            (x0, y0)
+            for y0 in range(0, RENDER_SIZE, TILE_SIZE)
+            for x0 in range(0, RENDER_SIZE, TILE_SIZE)
+        ]
+        center = 0.5 * (RENDER_SIZE - TILE_SIZE)
+        self.pending_tiles = sorted(
+            tiles, key=lambda t: -((t[0] - center) ** 2 + (t[1] - center) ** 2)
+        )
+
+    def render_tiles(self):
+        self.scene.main_camera_node = self.tile_cam_node
+        start = time.perf_counter()
+        num_tiles = 0
+        # Always render one tile and stop before overshooting the budget
+        while len(self.pending_tiles) > 0 and (
+            num_tiles == 0
+            or 1e3 * (time.perf_counter() - start) + self.tile_ms <= TILE_BUDGET_MS
+        ):
+            tile_start = time.perf_counter()
+            x0, y0 = self.pending_tiles.pop()
+            w = min(TILE_SIZE, RENDER_SIZE - x0)
+            h = min(TILE_SIZE, RENDER_SIZE - y0)
+            # Shift the principal point so that the tile sees its part of the full image
+            self.tile_cam.cx = 0.5 * RENDER_SIZE - x0
+            self.tile_cam.cy = 0.5 * RENDER_SIZE - y0
+            color = self.render(w, h)
+            np.multiply(
+                color,
+                1.0 / 255.0,
+                out=self.render_target.colors[y0 : y0 + h, x0 : x0 + w],
+            )
+            self.tile_ms = 1e3 * (time.perf_counter() - tile_start)
+            num_tiles += 1
+        self.scene.main_camera_node = self.cam_node
+
+    def draw(self):
+        self.sync_camera()
+        versions = (self.camera_version, self.scene_version)
+
+        if self.progressive:
+            if versions != self.rendered_versions:
+                # Moving: cheap low-resolution frame
+                self.rendered_versions = versions
+                self.render_preview()
+            elif len(self.pending_tiles) > 0:
+                # Settled: refine a few tiles
+                self.render_tiles()
+            else:
+                return
+            self.num_renders += 1
+            self.render_target.upload()
+            return
+
+        self.pending_tiles = []
+        if self.render_on_change and versions == self.rendered_versions:
+            # Nothing changed: skip the offscreen render and the upload
+            return
+        self.rendered_versions = versions
+        self.num_renders += 1
+
+        color = self.render(RENDER_SIZE, RENDER_SIZE)
+        # uint8 -> float32 without temporaries
+        np.multiply(color, 1.0 / 255.0, out=self.render_target.colors)
+
+        self.render_target.upload()
 
 
 if __name__ == "__main__":
@@ -1,40 +1,61 @@
+from argparse import ArgumentParser
+from typing import Optional
+
 import numpy as np
 
 import polyscope as ps
+import polyscope.imgui as psim
 
 from ps_utils.viewer.base_viewer import BaseViewer
+from ps_utils.structures import VolumeLod
+from ps_utils.io import as_contiguous, load_array
+from examples.utils.sdf import SparseSdf
 
 SDF_PATH = "data/bunny_sdf.npy"
+SDF_RES = 64
 
 
 class SdfViewer(BaseViewer):
     """
     Demo viewer showcasing Polyscope's native SDF visualization
+    Dense (.npy) and narrow-band (.npz, see `examples/utils/sdf.py`) SDFs are supported.
+    With a `mesh_path`, the SDF is computed once and then reopened from the asset cache.
+    `.npy` files are memory-mapped and converted to float32 in chunks (see `ps_utils.io.load_array`).
+    The SDF is displayed through a `VolumeLod`: a coarse level is shown during interactions.
     """
 
+    def pre_init(
+        self,
+        sdf_path: str = SDF_PATH,
+        mesh_path: Optional[str] = None,
+        resolution: int = SDF_RES,
+        narrow_band: bool = False,
+        **kwargs,
+    ):
+        self.sdf_path = sdf_path
+        self.mesh_path = mesh_path
+        self.resolution = resolution
+        self.narrow_band = narrow_band
+
     def post_init(self, **kwargs):
         # Load SDF grid of dimensions (res, res, res)
-        sdf_data = np.load(SDF_PATH)
+        self.load_stats = None
+        if self.mesh_path is not None and self.narrow_band:
+            from examples.utils.asset_cache import cached_sparse_sdf
 
-        # Create the corresponding Polyscope structure
-        dims = tuple(sdf_data.shape)
-        bound_low = [-1.0] * 3
-        bound_high = [1.0] * 3
+            sdf_data = cached_sparse_sdf(
+                self.mesh_path, resolution=self.resolution
+            ).to_dense()
+        elif self.mesh_path is not None:
+            from examples.utils.asset_cache import cached_sdf
 
-        ps_grid = ps.register_volume_grid("sample grid", dims, bound_low, bound_high)
-
-        # SDF-extracted mesh
-        ps_grid.add_scalar_quantity(
-            "mesh",
-            sdf_data,
-            defined_on="nodes",
-            enable_isosurface_viz=True,  # Extracts the mesh corresponding to the SDF
-            isosurface_level=0.0,  # Isosurface level (e.g., 0.0 for SDFs)
-            slice_planes_affect_isosurface=False,  # Prevent slicing the mesh (i.e., only SDF volume)
-            enabled=True,
-            isolines_enabled=True,  # Show isolines for the SDF
-        )
-        # NOTE: most of the parameters above can be controlled directly from the UI!
+            sdf_data = as_contiguous(
+                cached_sdf(self.mesh_path, resolution=self.resolution)
+            )
+        elif self.sdf_path.endswith(".npz"):
+            sdf_data = SparseSdf.load(self.sdf_path).to_dense()
+        else:
+            sdf_data, self.load_stats = load_array(self.sdf_path, dtype=np.float32)
 
         # ============
         # SLICE PLANE
@@ -47,10 +68,46 @@ class SdfViewer(BaseViewer):
         # Uncomment to draw a transparent plane
         # slice_plane.set_draw_plane(True)
 
+        # Create the corresponding Polyscope structures: a pyramid of grids whose coarsest
+        # level is shown while dragging the slice plane or the isosurface level
+        bound_low = [-1.0] * 3
+        bound_high = [1.0] * 3
+
+        # SDF-extracted mesh
+        self.volume = VolumeLod(
+            sdf_data,
+            bound_low,
+            bound_high,
+            name="sample grid",
+            quantity_name="mesh",
+            isosurface_level=0.0,  # Isosurface level (e.g., 0.0 for SDFs)
+            slice_planes=[slice_plane],  # Coarse level while the slice plane moves
+            slice_planes_affect_isosurface=False,  # Prevent slicing the mesh (i.e., only SDF volume)
+            isolines_enabled=True,  # Show isolines for the SDF
+        )
+        # NOTE: most of the parameters above can be controlled directly from the UI!
+
     def gui(self):
         # Just calling super to get FPS
         super().gui()
 
+        if self.load_stats is not None:
+            psim.Text(str(self.load_stats))
+
+        self.volume.gui()
+
 
 if __name__ == "__main__":
-    SdfViewer()
+    parser = ArgumentParser()
+    parser.add_argument("--sdf_path", type=str, default=SDF_PATH)
+    parser.add_argument("--mesh_path", type=str, default=None)
+    parser.add_argument("--resolution", type=int, default=SDF_RES)
+    parser.add_argument("--narrow_band", action="store_true")
+    args = parser.parse_args()
+
+    SdfViewer(
+        sdf_path=args.sdf_path,
+        mesh_path=args.mesh_path,
+        resolution=args.resolution,
+        narrow_band=args.narrow_band,
+    )
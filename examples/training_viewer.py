@@ -2,7 +2,6 @@ from collections import defaultdict
 from PIL import Image
 from argparse import ArgumentParser
 
-import numpy as np
 import torch
 import torch.nn.functional as F
 import torchvision.transforms as transforms
@@ -10,7 +9,8 @@ import torchvision.transforms as transforms
 import polyscope as ps
 import polyscope.imgui as psim
 
-from ps_utils.viewer.base_viewer import BaseViewer
+from ps_utils.viewer.base_viewer import BaseViewer, add_headless_args, headless_kwargs
+from ps_utils.viewer.render_target import RenderTarget
 from ps_utils.ui.buttons import state_button
 from ps_utils.ui.image_utils import Thumbnail
 from examples.utils.mlp_field import MlpField, normalized_pixel_grid
@@ -54,21 +54,24 @@ class TrainingViewer(BaseViewer):
         self.optimizing = True
 
     def init_render_buffer(self):
-
-        self.render_buffer_quantity = ps.add_raw_color_alpha_render_image_quantity(
-            "render_buffer",
-            np.ones((self.height, self.width), dtype=float),
-            np.ones((self.height, self.width, 4), dtype=float),
-            enabled=True,
-            allow_fullscreen_compositing=True,
+        # Persistent RGBA storage on `self.device`, predictions are copied into it
+        self.render_target = RenderTarget(
+            "render_buffer", self.height, self.width, device=self.device
         )
 
-        self.render_buffer = ps.get_quantity_buffer("render_buffer", "colors")
-
-    def pre_init(self, device="cpu", res=256, image_path="data/mit.jpg", **kwargs):
+    def pre_init(
+        self,
+        device="cpu",
+        res=256,
+        image_path="data/mit.jpg",
+        async_step=False,
+        **kwargs,
+    ):
         self.device = device
         self.res = res
         self.image_path = image_path
+        # Train in a background thread so that the UI stays responsive
+        self.async_step = async_step
 
     def post_init(self, **kwargs):
         # Override resolution to square-shaped
@@ -78,11 +81,20 @@ class TrainingViewer(BaseViewer):
         # Create a render buffer to display the result of optimization
         self.init_render_buffer()
 
+    def headless_done(self):
+        return self.i_step >= NUM_ITERATIONS
+
     def step(self):
         if self.optimizing:
             self.optimizing, loss_dict = self.training_step()
             for k, v in loss_dict.items():
                 self.losses[k].append(v)
+        # Pauses the step worker once training is over
+        return self.optimizing
+
+    @torch.no_grad()
+    def snapshot(self):
+        return self.pred.detach().clone()
 
     def gui(self):
         # Just calling super to get FPS
@@ -92,11 +104,25 @@ class TrainingViewer(BaseViewer):
 
         psim.Text(f"Iteration: {self.i_step:03d}/{NUM_ITERATIONS:03d}")
 
-        _, self.optimizing = state_button(self.optimizing, "Stop", "Train")
+        clicked, optimizing = state_button(self.optimizing, "Stop", "Train")
+        if clicked:
+            # NB: pause the worker first so that `optimizing` isn't overwritten by a step in flight
+            if self.step_worker is not None:
+                self.step_worker.pause()
+            self.optimizing = optimizing
+            if self.step_worker is not None and optimizing:
+                self.step_worker.resume()
 
         psim.SameLine()
         if psim.Button("Reset##training_viewer"):
-            self.reset()
+            if self.step_worker is not None:
+                # Reset in between two steps and restart the worker
+                self.step_worker.reset(self.reset)
+                self.step_worker.resume()
+            else:
+                self.reset()
+
+        self.render_target.gui()
 
         psim.SeparatorText("Target Image")
 
@@ -104,17 +130,16 @@ class TrainingViewer(BaseViewer):
 
     @torch.no_grad()
     def draw(self):
-        rendered_image = torch.cat(
-            [
-                self.pred.detach(),
-                torch.ones((self.height, self.width, 1), device=self.device),
-            ],
-            dim=-1,
-        )
-        if self.device == "cpu":
-            self.render_buffer.update_data_from_host(rendered_image.reshape(-1, 4))
+        if self.step_worker is None:
+            pred = self.pred.detach()
+        elif self.snapshot_updated:
+            pred = self.latest_snapshot
         else:
-            self.render_buffer.update_data_from_device(rendered_image)
+            # Nothing new to display
+            return
+
+        # No allocation: copied into the persistent storage and uploaded from it
+        self.render_target.write_rgb(pred)
 
     def training_step(self):
         # Just a safety guard
@@ -148,7 +173,15 @@ if __name__ == "__main__":
     parser.add_argument("--device", type=str, choices=["cpu", "cuda"], default="cpu")
     parser.add_argument("--res", type=int, default=256)
     parser.add_argument("--image", type=str, default="data/mit.jpg")
+    parser.add_argument("--async_step", action="store_true")
+    add_headless_args(parser)
 
     args = parser.parse_args()
 
-    TrainingViewer(device=args.device, res=args.res, image_path=args.image)
+    TrainingViewer(
+        device=args.device,
+        res=args.res,
+        image_path=args.image,
+        async_step=args.async_step,
+        **headless_kwargs(args),
+    )
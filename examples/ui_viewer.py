@@ -42,6 +42,9 @@ class UiViewer(BaseViewer):
         # Initialize alert handler (with a red background)
         self.alert_handler = AlertHandler(background_color=(1.0, 0.0, 0.0, 1.0))
 
+        # Initialize the background save queue (only errors go to the red alert handler)
+        self.save_queue = SaveQueue(self.alert_handler, alert_on_success=False)
+
         # Initialize save path
         self.save_path = "saved_message.txt"
         self.save_message = "Write a poem here..."
@@ -142,13 +145,9 @@ class UiViewer(BaseViewer):
                 confirm_label="Are you sure?",
             )
             if clicked:
-                try:
-                    with open(self.save_path, "w") as f:
-                        f.write(self.save_message)
-                except Exception as e:
-                    self.alert_handler.trigger(
-                        f"Could not save the message at: {self.save_path}"
-                    )
+                # Written in the background, nothing blocks here
+                self.save_queue.save(self.save_path, self.save_message)
+            self.save_queue.gui()
             _, self.save_message = psim.InputText(
                 "Message##ui_viewer", self.save_message
             )
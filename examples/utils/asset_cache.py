@@ -0,0 +1,291 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import trimesh
+
+from ps_utils.io import write_atomic
+from examples.utils.sdf import (
+    DEFAULT_BAND_WIDTH,
+    DEFAULT_BLOCK_SIZE,
+    SparseSdf,
+    mesh_sdf_narrow_band,
+    mesh_sdf_on_grid_chunked,
+)
+from examples.utils.voxelize import mesh_to_voxel_grid_indices
+
+CACHE_VERSION = 1  # Bump to invalidate all entries when the builders change
+DEFAULT_CACHE_DIR = os.environ.get(
+    "PS_UTILS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ps_utils")
+)
+DEFAULT_CACHE_BYTES = 4 * 1024**3
+HASH_CHUNK_BYTES = 2**20
+
+DEFAULT_CACHE: Optional["AssetCache"] = None
+
+
+def get_default_cache() -> "AssetCache":
+    global DEFAULT_CACHE
+    if DEFAULT_CACHE is None:
+        DEFAULT_CACHE = AssetCache()
+    return DEFAULT_CACHE
+
+
+def hash_file(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_npy(path: str) -> np.ndarray:
+    # Read-only memmap: opening is instant, pages are read on access
+    return np.load(path, mmap_mode="r")
+
+
+class AssetCache:
+    """
+    On-disk cache of results computed from a mesh file (SDFs, voxelizations...).
+    Entries are keyed by a hash of the mesh bytes, the kind of result and its parameters:
+    renaming a mesh keeps its entries while editing it invalidates them.
+    Every entry is a single file written atomically by its builder (e.g., an `.npy` memmapped on load)
+    next to a `.json` manifest used to validate it. Once entries exceed `max_bytes`,
+    the least recently used ones are removed.
+    """
+
+    def __init__(
+        self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_CACHE_BYTES
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # Mesh hashes by (path, size, mtime): a mesh is only hashed once per process
+        self.mesh_hashes: Dict[Tuple[str, int, int], str] = {}
+
+        # Stats
+        self.num_hits = 0
+        self.num_misses = 0
+
+    def mesh_hash(self, mesh_path: str) -> str:
+        path = os.path.abspath(mesh_path)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        if key not in self.mesh_hashes:
+            self.mesh_hashes[key] = hash_file(path)
+        return self.mesh_hashes[key]
+
+    def key(self, kind: str, mesh_path: str, params: Dict[str, Any]) -> str:
+        description = json.dumps(
+            {
+                "version": CACHE_VERSION,
+                "kind": kind,
+                "mesh": self.mesh_hash(mesh_path),
+                "params": params,
+            },
+            sort_keys=True,
+        )
+        digest = hashlib.blake2b(description.encode("utf-8"), digest_size=16)
+        return f"{kind}_{digest.hexdigest()}"
+
+    def manifest_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    # ===============
+    # ENTRIES
+    # ===============
+
+    def read_manifest(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the manifest of `key` if its file is complete, None otherwise.
+        """
+        try:
+            with open(self.manifest_path(key), "r") as f:
+                manifest = json.load(f)
+            path = os.path.join(self.cache_dir, manifest["file"])
+            if os.path.getsize(path) != manifest["nbytes"]:
+                return None
+            return manifest
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def get(
+        self,
+        kind: str,
+        mesh_path: str,
+        params: Dict[str, Any],
+        build: Callable[[str], None],
+        load: Callable[[str], Any] = load_npy,
+        suffix: str = ".npy",
+    ) -> Any:
+        """
+        Returns `load(path)` of the entry of `mesh_path` for `kind` and `params` (JSON-serializable).
+        Missing or invalid entries are first written by `build(path)`.
+        """
+        key = self.key(kind, mesh_path, params)
+        path = os.path.join(self.cache_dir, f"{key}{suffix}")
+
+        if self.read_manifest(key) is not None:
+            try:
+                value = load(path)
+                self.num_hits += 1
+                # Most recently used
+                os.utime(self.manifest_path(key))
+                return value
+            except Exception as e:
+                print(f"Couldn't load cache entry at: {path} ({e!r}), rebuilding it")
+        self.num_misses += 1
+
+        # The manifest is written last: interrupted builds are never considered valid
+        start = time.perf_counter()
+        write_atomic(path, build)
+        manifest = {
+            "kind": kind,
+            "mesh_path": os.path.abspath(mesh_path),
+            "mesh_hash": self.mesh_hash(mesh_path),
+            "params": params,
+            "file": os.path.basename(path),
+            "nbytes": os.path.getsize(path),
+            "build_time": time.perf_counter() - start,
+        }
+        write_atomic(self.manifest_path(key), json.dumps(manifest, indent=2))
+        self.shrink(keep=key)
+
+        return load(path)
+
+    def remove(self, key: str) -> None:
+        # Manifest and file, even if the entry is invalid
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(f"{key}."):
+                os.remove(entry.path)
+
+    def keys(self) -> List[str]:
+        """
+        Returns the keys of the cache entries, least recently used first.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+        manifest_paths = [
+            entry.path
+            for entry in os.scandir(self.cache_dir)
+            if entry.is_file() and entry.name.endswith(".json")
+        ]
+        manifest_paths.sort(key=os.path.getmtime)
+        return [os.path.splitext(os.path.basename(p))[0] for p in manifest_paths]
+
+    @property
+    def nbytes(self) -> int:
+        manifests = (self.read_manifest(key) for key in self.keys())
+        return sum(manifest["nbytes"] for manifest in manifests if manifest is not None)
+
+    def shrink(self, keep: Optional[str] = None) -> None:
+        # Remove least recently used entries (but never `keep`)
+        keys = self.keys()
+        sizes = {}
+        for key in keys:
+            manifest = self.read_manifest(key)
+            sizes[key] = 0 if manifest is None else manifest["nbytes"]
+        nbytes = sum(sizes.values())
+        for key in keys:
+            if nbytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self.remove(key)
+            nbytes -= sizes[key]
+
+    def clear(self) -> None:
+        for key in self.keys():
+            self.remove(key)
+
+
+# ===============
+# ASSETS
+# ===============
+
+
+def cached_sdf(
+    mesh_path: str,
+    resolution: int = 64,
+    padding: float = 0.1,
+    dtype: str = "float32",
+    num_workers: Optional[int] = None,
+    cache: Optional[AssetCache] = None,
+) -> np.ndarray:
+    """
+    Dense SDF of `mesh_path` (see `mesh_sdf_on_grid_chunked`), as a read-only memmap.
+    """
+    cache = get_default_cache() if cache is None else cache
+
+    def build(path):
+        sdf_grid, _ = mesh_sdf_on_grid_chunked(
+            trimesh.load(mesh_path),
+            resolution=[resolution] * 3,
+            padding=padding,
+            dtype=np.dtype(dtype),
+            out_path=path,
+            num_workers=num_workers,
+        )
+        sdf_grid.flush()
+
+    params = {"resolution": resolution, "padding": padding, "dtype": dtype}
+    return cache.get("sdf", mesh_path, params, build)
+
+
+def cached_sparse_sdf(
+    mesh_path: str,
+    resolution: int = 64,
+    padding: float = 0.1,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    band_width: int = DEFAULT_BAND_WIDTH,
+    num_workers: Optional[int] = None,
+    cache: Optional[AssetCache] = None,
+) -> SparseSdf:
+    """
+    Narrow-band SDF of `mesh_path` (see `mesh_sdf_narrow_band`), stored compressed.
+    """
+    cache = get_default_cache() if cache is None else cache
+
+    def build(path):
+        sparse_sdf = mesh_sdf_narrow_band(
+            trimesh.load(mesh_path),
+            resolution=[resolution] * 3,
+            padding=padding,
+            block_size=block_size,
+            band_width=band_width,
+            num_workers=num_workers,
+        )
+        sparse_sdf.save(path, compressed=True)
+
+    params = {
+        "resolution": resolution,
+        "padding": padding,
+        "block_size": block_size,
+        "band_width": band_width,
+    }
+    return cache.get(
+        "sparse_sdf", mesh_path, params, build, load=SparseSdf.load, suffix=".npz"
+    )
+
+
+def cached_voxels(
+    mesh_path: str,
+    resolution: int = 64,
+    method: str = "subdivide",
+    cache: Optional[AssetCache] = None,
+) -> np.ndarray:
+    """
+    Occupied voxel coordinates of `mesh_path` (see `mesh_to_voxel_grid_indices`), as a read-only memmap.
+    """
+    cache = get_default_cache() if cache is None else cache
+
+    def build(path):
+        _, voxel_coords = mesh_to_voxel_grid_indices(
+            trimesh.load(mesh_path), resolution=resolution, method=method
+        )
+        np.save(path, voxel_coords)
+
+    params = {"resolution": resolution, "method": method}
+    return cache.get("voxels", mesh_path, params, build)
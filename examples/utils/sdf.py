@@ -1,10 +1,20 @@
 from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, fields
+from typing import Callable, List, Optional, Tuple
+import itertools
+import os
 
 import numpy as np
 import trimesh
+from scipy import ndimage
 
 # DISCLAIMER: this is from GPT!
 
+DEFAULT_CHUNK_POINTS = 2**18  # Grid points evaluated per task
+DEFAULT_BLOCK_SIZE = 8  # Narrow band blocks of 8^3 nodes
+DEFAULT_BAND_WIDTH = 2  # Exact distances within 2 nodes of the surface
+
 
 def mesh_sdf_on_grid(mesh, resolution=(64, 64, 64), padding=0.1):
     """
@@ -62,14 +72,415 @@ def mesh_sdf_on_grid(mesh, resolution=(64, 64, 64), padding=0.1):
     return sdf_grid, grid_pts, (xs, ys, zs)
 
 
+# ===============
+# CHUNKED ENGINE
+# ===============
+
+
+def padded_grid_axes(
+    mesh: trimesh.Trimesh, resolution=(64, 64, 64), padding: float = 0.1
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the coordinate vectors (xs, ys, zs) of the grid used by `mesh_sdf_on_grid`.
+    """
+    min_bound, max_bound = mesh.bounds
+    size = max_bound - min_bound
+    min_bound = min_bound - size * padding
+    max_bound = max_bound + size * padding
+    return tuple(
+        np.linspace(min_bound[i], max_bound[i], resolution[i]) for i in range(3)
+    )
+
+
+def slab_points(xs, ys, zs, i0: int, i1: int) -> np.ndarray:
+    """
+    Returns the (flattened, C-order) grid points of the x-slab [i0, i1).
+    """
+    X, Y, Z = np.meshgrid(xs[i0:i1], ys, zs, indexing="ij")
+    return np.stack([X.ravel(), Y.ravel(), Z.ravel()], axis=-1)
+
+
+# Mesh of the worker processes (set once by `init_sdf_worker`)
+WORKER_MESH: Optional[trimesh.Trimesh] = None
+
+
+def init_sdf_worker(vertices: np.ndarray, faces: np.ndarray) -> None:
+    global WORKER_MESH
+    WORKER_MESH = trimesh.Trimesh(vertices, faces, process=False)
+
+
+def sdf_slab(xs, ys, zs, i0: int, i1: int) -> Tuple[int, np.ndarray]:
+    # NB: the proximity tree is built once per worker and cached on its mesh
+    values = trimesh.proximity.signed_distance(
+        WORKER_MESH, slab_points(xs, ys, zs, i0, i1)
+    )
+    return i0, values.reshape(i1 - i0, len(ys), len(zs))
+
+
+def print_progress(done: int, total: int) -> None:
+    if done == total or done % max(1, total // 10) == 0:
+        print(f"SDF: {done}/{total} chunks")
+
+
+def run_sdf_tasks(
+    mesh: trimesh.Trimesh,
+    fn: Callable,
+    tasks: List[tuple],
+    write: Callable,
+    num_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = print_progress,
+) -> None:
+    """
+    Calls `write(*fn(*task))` for every task, with `fn` evaluated in-process (`num_workers` = 0)
+    or in a pool of processes holding `mesh` (see `init_sdf_worker`).
+    At most two tasks per worker are in flight to bound memory.
+    """
+
+    num_done = 0
+
+    def done(result):
+        nonlocal num_done
+        write(*result)
+        num_done += 1
+        if progress is not None:
+            progress(num_done, len(tasks))
+
+    if num_workers == 0:
+        init_sdf_worker(mesh.vertices, mesh.faces)
+        for task in tasks:
+            done(fn(*task))
+        return
+
+    num_workers = num_workers or os.cpu_count()
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        initializer=init_sdf_worker,
+        initargs=(np.asarray(mesh.vertices), np.asarray(mesh.faces)),
+    ) as pool:
+        pending = set()
+        for task in tasks:
+            # Bound the number of results held in memory
+            if len(pending) >= 2 * num_workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done(future.result())
+            pending.add(pool.submit(fn, *task))
+        for future in wait(pending).done:
+            done(future.result())
+
+
+def mesh_sdf_on_grid_chunked(
+    mesh: trimesh.Trimesh,
+    resolution=(64, 64, 64),
+    padding: float = 0.1,
+    dtype=np.float32,
+    out_path: Optional[str] = None,
+    num_workers: Optional[int] = None,
+    chunk_points: int = DEFAULT_CHUNK_POINTS,
+    progress: Optional[Callable[[int, int], None]] = print_progress,
+):
+    """
+    Same grid as `mesh_sdf_on_grid` but evaluated by x-slabs of about `chunk_points` points,
+    generated on the fly and dispatched to `num_workers` processes (0: in-process).
+    Slabs are written into a preallocated `dtype` volume, or into an `.npy` memmap at `out_path`
+    so that the volume never needs to fit in memory.
+    `progress(done, total)` is called after every slab.
+
+    Returns
+    -------
+    sdf_grid : np.ndarray (or np.memmap) of shape (nx, ny, nz)
+    grid_coords : tuple of three 1D arrays (xs, ys, zs)
+    """
+    xs, ys, zs = padded_grid_axes(mesh, resolution, padding)
+    shape = (len(xs), len(ys), len(zs))
+    if out_path is not None:
+        sdf_grid = np.lib.format.open_memmap(
+            out_path, mode="w+", dtype=dtype, shape=shape
+        )
+    else:
+        sdf_grid = np.empty(shape, dtype=dtype)
+
+    slab_size = max(1, chunk_points // (shape[1] * shape[2]))
+    slabs = [
+        (i0, min(i0 + slab_size, shape[0])) for i0 in range(0, shape[0], slab_size)
+    ]
+
+    def write(i0, values):
+        sdf_grid[i0 : i0 + len(values)] = values
+
+    run_sdf_tasks(
+        mesh,
+        sdf_slab,
+        [(xs, ys, zs, i0, i1) for i0, i1 in slabs],
+        write,
+        num_workers=num_workers,
+        progress=progress,
+    )
+
+    if isinstance(sdf_grid, np.memmap):
+        sdf_grid.flush()
+    return sdf_grid, (xs, ys, zs)
+
+
+# ===============
+# NARROW BAND
+# ===============
+
+
+@dataclass
+class SparseSdf:
+    """
+    Narrow-band SDF stored as dense blocks of `block_size`^3 nodes around the surface.
+    Nodes outside of the band take the clamped value `block_sign * far_value`,
+    where `block_sign` (+1 inside, -1 outside, 0 in the band) is stored per block.
+    NB: distances follow `trimesh.proximity.signed_distance`, i.e., positive inside.
+    """
+
+    shape: Tuple[int, int, int]
+    block_size: int
+    block_coords: np.ndarray  # (K, 3) block indices of the band
+    blocks: np.ndarray  # (K, B, B, B) exact (clamped) distances
+    block_sign: np.ndarray  # (bx, by, bz) int8
+    far_value: float
+    origin: np.ndarray  # Position of node (0, 0, 0)
+    spacing: np.ndarray  # Distance between nodes along each axis
+
+    @property
+    def nbytes(self) -> int:
+        return self.blocks.nbytes + self.block_coords.nbytes + self.block_sign.nbytes
+
+    def to_dense(
+        self, dtype=np.float32, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Expands the blocks into a (nx, ny, nz) volume (e.g., `out` can be a memmap).
+        """
+        B = self.block_size
+        nx, ny, nz = self.shape
+        if out is None:
+            out = np.empty(self.shape, dtype=dtype)
+
+        # Far field, one x-slab of blocks at a time
+        for bx in range(self.block_sign.shape[0]):
+            signs = np.repeat(np.repeat(self.block_sign[bx], B, axis=0), B, axis=1)
+            out[bx * B : (bx + 1) * B] = (
+                self.far_value * signs[None, :ny, :nz]
+            ).astype(out.dtype)
+
+        # Band
+        for (bx, by, bz), block in zip(self.block_coords, self.blocks):
+            x0, y0, z0 = bx * B, by * B, bz * B
+            x1, y1, z1 = min(x0 + B, nx), min(y0 + B, ny), min(z0 + B, nz)
+            out[x0:x1, y0:y1, z0:z1] = block[: x1 - x0, : y1 - y0, : z1 - z0]
+        return out
+
+    def save(self, path: str, compressed: bool = False) -> None:
+        savez = np.savez_compressed if compressed else np.savez
+        savez(path, **{f.name: np.asarray(getattr(self, f.name)) for f in fields(self)})
+
+    @staticmethod
+    def load(path: str) -> "SparseSdf":
+        data = np.load(path)
+        return SparseSdf(
+            shape=tuple(int(x) for x in data["shape"]),
+            block_size=int(data["block_size"]),
+            block_coords=data["block_coords"],
+            blocks=data["blocks"],
+            block_sign=data["block_sign"],
+            far_value=float(data["far_value"]),
+            origin=data["origin"],
+            spacing=data["spacing"],
+        )
+
+
+def block_points(
+    origin: np.ndarray, spacing: np.ndarray, block_coords: np.ndarray, block_size: int
+) -> np.ndarray:
+    """
+    Returns the (K * B^3, 3) node positions of the given blocks.
+    """
+    node_ids = block_coords[:, None, :] * block_size + np.arange(block_size)[:, None]
+    positions = origin + spacing * node_ids  # (K, B, 3)
+    K, B = len(block_coords), block_size
+    points = np.empty((K, B, B, B, 3))
+    points[..., 0] = positions[:, :, None, None, 0]
+    points[..., 1] = positions[:, None, :, None, 1]
+    points[..., 2] = positions[:, None, None, :, 2]
+    return points.reshape(-1, 3)
+
+
+def sdf_blocks(
+    origin: np.ndarray,
+    spacing: np.ndarray,
+    block_coords: np.ndarray,
+    block_size: int,
+    first_block: int,
+) -> Tuple[int, np.ndarray]:
+    values = trimesh.proximity.signed_distance(
+        WORKER_MESH, block_points(origin, spacing, block_coords, block_size)
+    )
+    return first_block, values.reshape(-1, block_size, block_size, block_size)
+
+
+def mesh_sdf_narrow_band(
+    mesh: trimesh.Trimesh,
+    resolution=(64, 64, 64),
+    padding: float = 0.1,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    band_width: int = DEFAULT_BAND_WIDTH,
+    num_workers: Optional[int] = None,
+    chunk_points: int = DEFAULT_CHUNK_POINTS,
+    progress: Optional[Callable[[int, int], None]] = print_progress,
+) -> SparseSdf:
+    """
+    Same grid as `mesh_sdf_on_grid` but exact distances are only computed in a narrow band:
+    1. the surface is voxelized (with a pitch of `band_width` nodes) and the blocks within
+       `band_width` nodes of a surface voxel form the band,
+    2. exact distances are evaluated in the band blocks (see `run_sdf_tasks`) and clamped to
+       `far_value` = `band_width` * spacing, which is exact since every node closer to the surface is in the band,
+    3. the band contains every cell crossed by the surface, so the sign is constant over each connected
+       region of non-band blocks: it is given by one exact query per region (cavities and nested shells included).
+    """
+    xs, ys, zs = padded_grid_axes(mesh, resolution, padding)
+    shape = (len(xs), len(ys), len(zs))
+    origin = np.array([xs[0], ys[0], zs[0]])
+    spacing = np.array([ax[1] - ax[0] for ax in (xs, ys, zs)])
+    B = block_size
+    block_shape = tuple(-(-n // B) for n in shape)
+    far_value = float(band_width * spacing.min())
+
+    # 1. Band blocks from the voxelized surface:
+    # a surface point is within pitch / 2 of its voxel center (per axis),
+    # the extra spacing puts all the corners of the cells it lies in in the band
+    pitch = far_value
+    centers = mesh.voxelized(pitch, method="subdivide").points
+    radius = far_value + 0.5 * pitch + spacing
+    max_node = np.array(shape) - 1
+    first_block = np.clip(np.floor((centers - radius - origin) / spacing), 0, max_node)
+    last_block = np.clip(np.ceil((centers + radius - origin) / spacing), 0, max_node)
+    first_block = first_block.astype(np.int64) // B
+    last_block = last_block.astype(np.int64) // B
+    band = np.zeros(block_shape, dtype=bool)
+    max_span = int((last_block - first_block).max(initial=0))
+    for offset in itertools.product(range(max_span + 1), repeat=3):
+        band[tuple(np.minimum(first_block + offset, last_block).T)] = True
+    block_coords = np.argwhere(band)
+
+    # 2. Exact distances in the band
+    blocks = np.empty((len(block_coords), B, B, B), dtype=np.float32)
+    blocks_per_task = max(1, chunk_points // B**3)
+
+    def write(first_block, values):
+        blocks[first_block : first_block + len(values)] = np.clip(
+            values, -far_value, far_value
+        )
+
+    run_sdf_tasks(
+        mesh,
+        sdf_blocks,
+        [
+            (origin, spacing, block_coords[i : i + blocks_per_task], B, i)
+            for i in range(0, len(block_coords), blocks_per_task)
+        ],
+        write,
+        num_workers=num_workers,
+        progress=progress,
+    )
+
+    # 3. Far field: no surface crosses a region of non-band blocks, query one node per region
+    labels, num_regions = ndimage.label(~band)
+    region_sign = np.zeros(num_regions + 1, dtype=np.int8)
+    if num_regions > 0:
+        region_ids, first_ids = np.unique(labels.ravel(), return_index=True)
+        first_ids = first_ids[region_ids > 0]
+        region_blocks = np.stack(np.unravel_index(first_ids, block_shape), axis=-1)
+        region_sign[region_ids[region_ids > 0]] = np.sign(
+            trimesh.proximity.signed_distance(
+                mesh, origin + spacing * region_blocks * B
+            )
+        )
+    block_sign = region_sign[labels]
+
+    return SparseSdf(
+        shape=shape,
+        block_size=B,
+        block_coords=block_coords.astype(np.int32),
+        blocks=blocks,
+        block_sign=block_sign,
+        far_value=far_value,
+        origin=origin,
+        spacing=spacing,
+    )
+
+
 if __name__ == "__main__":
 
     parser = ArgumentParser()
     parser.add_argument("input", type=str)
     parser.add_argument("output", type=str)
     parser.add_argument("--resolution", type=int, default=64)
+    parser.add_argument("--num_workers", type=int, default=None)
+    parser.add_argument(
+        "--dtype", type=str, choices=["float32", "float64"], default="float32"
+    )
+    parser.add_argument("--chunk_points", type=int, default=DEFAULT_CHUNK_POINTS)
+    parser.add_argument("--narrow_band", action="store_true")
+    parser.add_argument("--block_size", type=int, default=DEFAULT_BLOCK_SIZE)
+    parser.add_argument("--band_width", type=int, default=DEFAULT_BAND_WIDTH)
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Reuse results from (and store them in) this asset cache",
+    )
     args = parser.parse_args()
 
-    mesh = trimesh.load(args.input)
-    sdf_grid, _, _ = mesh_sdf_on_grid(mesh, resolution=[args.resolution] * 3)
-    np.save(args.output, sdf_grid)
+    if args.cache_dir is not None:
+        # NB: imported here as the asset cache depends on this module
+        from examples.utils.asset_cache import (
+            AssetCache,
+            cached_sdf,
+            cached_sparse_sdf,
+        )
+
+        cache = AssetCache(args.cache_dir)
+        if args.narrow_band:
+            cached_sparse_sdf(
+                args.input,
+                resolution=args.resolution,
+                block_size=args.block_size,
+                band_width=args.band_width,
+                num_workers=args.num_workers,
+                cache=cache,
+            ).save(args.output)
+        else:
+            sdf_grid = cached_sdf(
+                args.input,
+                resolution=args.resolution,
+                dtype=args.dtype,
+                num_workers=args.num_workers,
+                cache=cache,
+            )
+            np.save(args.output, sdf_grid)
+    elif args.narrow_band:
+        # Sparse blocks saved as `.npz`, load them with `SparseSdf.load(...)`
+        sparse_sdf = mesh_sdf_narrow_band(
+            trimesh.load(args.input),
+            resolution=[args.resolution] * 3,
+            block_size=args.block_size,
+            band_width=args.band_width,
+            num_workers=args.num_workers,
+            chunk_points=args.chunk_points,
+        )
+        sparse_sdf.save(args.output)
+    else:
+        # Written slab by slab to the output file (same layout as `np.save`)
+        output = args.output if args.output.endswith(".npy") else f"{args.output}.npy"
+        mesh_sdf_on_grid_chunked(
+            trimesh.load(args.input),
+            resolution=[args.resolution] * 3,
+            dtype=np.dtype(args.dtype),
+            out_path=output,
+            num_workers=args.num_workers,
+            chunk_points=args.chunk_points,
+        )
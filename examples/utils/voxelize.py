@@ -44,14 +44,38 @@ def mesh_to_voxel_grid_indices(
     return occupancy, indices
 
 
+def upsample_voxels(coords: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Splits every voxel into `factor**3` voxels
+    """
+    sub_offsets = np.stack(
+        np.meshgrid(*[np.arange(factor)] * 3, indexing="ij"), axis=-1
+    ).reshape(-1, 3)
+    return (factor * coords[:, None, :] + sub_offsets[None, :, :]).reshape(-1, 3)
+
+
 if __name__ == "__main__":
 
     parser = ArgumentParser()
     parser.add_argument("input", type=str)
     parser.add_argument("output", type=str)
     parser.add_argument("--resolution", type=int, default=64)
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Reuse results from (and store them in) this asset cache",
+    )
     args = parser.parse_args()
 
-    mesh = trimesh.load(args.input)
-    _, voxel_coords = mesh_to_voxel_grid_indices(mesh, resolution=args.resolution)
+    if args.cache_dir is not None:
+        # NB: imported here as the asset cache depends on this module
+        from examples.utils.asset_cache import AssetCache, cached_voxels
+
+        voxel_coords = cached_voxels(
+            args.input, resolution=args.resolution, cache=AssetCache(args.cache_dir)
+        )
+    else:
+        mesh = trimesh.load(args.input)
+        _, voxel_coords = mesh_to_voxel_grid_indices(mesh, resolution=args.resolution)
     np.save(args.output, voxel_coords)
@@ -0,0 +1,77 @@
+from argparse import ArgumentParser
+import time
+
+import numpy as np
+import polyscope as ps
+
+from ps_utils.structures import MeshMode, VoxelSet
+from examples.utils.voxelize import upsample_voxels
+
+VOXEL_PATH = "data/bunny_voxels.npy"
+VOXEL_RES = 32
+NUM_HOVERS = 20
+
+
+def time_hovers(voxel_set: VoxelSet, num_hovers: int = NUM_HOVERS):
+    """
+    Returns the average time (in ms) of a hover update (brush moved, only dirty voxels recolored)
+    and of a full recolor. Both upload the whole color buffer.
+    """
+    centers = np.linspace(0, voxel_set.num_voxels - 1, num_hovers).astype(np.int64)
+    brushes = [voxel_set.brush_ids(voxel_set.coords[i]) for i in centers]
+    no_change = np.zeros(0, dtype=np.int64)
+
+    start = time.perf_counter()
+    for within_radius in brushes:
+        voxel_set.update_selection_buffer(within_radius, no_change)
+    hover_time = (time.perf_counter() - start) / num_hovers
+
+    start = time.perf_counter()
+    for _ in range(num_hovers):
+        voxel_set.update_selection_buffer()
+    full_time = (time.perf_counter() - start) / num_hovers
+
+    return 1e3 * hover_time, 1e3 * full_time
+
+
+if __name__ == "__main__":
+    # Compare triangle counts, registration and recoloring times of each `MeshMode`
+    parser = ArgumentParser()
+    parser.add_argument("--input", type=str, default=VOXEL_PATH)
+    parser.add_argument("--res", type=int, default=VOXEL_RES)
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    ps.init()
+
+    voxel_coords = np.load(args.input)
+
+    print(
+        f"{'res':>6} {'voxels':>10} {'mode':>8} {'triangles':>12} {'vertices':>12} {'time (s)':>10}"
+        f" {'hover (ms)':>11} {'full (ms)':>10}"
+    )
+    for factor in args.factors:
+        coords = upsample_voxels(voxel_coords, factor)
+        for mesh_mode in MeshMode:
+            start = time.perf_counter()
+            voxel_set = VoxelSet(
+                coords,
+                args.res * factor,
+                -1.0,
+                1.0,
+                name=f"voxel_set_{factor}_{mesh_mode.value}",
+                mesh_mode=mesh_mode,
+            )
+            elapsed = time.perf_counter() - start
+            hover_time, full_time = (
+                time_hovers(voxel_set)
+                if voxel_set.interactive
+                else (float("nan"), float("nan"))
+            )
+
+            print(
+                f"{args.res * factor:>6} {len(coords):>10} {mesh_mode.value:>8} "
+                f"{voxel_set.num_faces:>12} {len(voxel_set.vertices):>12} {elapsed:>10.3f}"
+                f" {hover_time:>11.2f} {full_time:>10.2f}"
+            )
+            ps.remove_all_structures()
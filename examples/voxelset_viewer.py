@@ -1,9 +1,13 @@
+from argparse import ArgumentParser
+from typing import Optional
+
 import numpy as np
 
 import polyscope.imgui as psim
 
 from ps_utils.viewer.base_viewer import BaseViewer
 from ps_utils.structures import VoxelSet
+from ps_utils.io import load_array
 
 VOXEL_PATH = "data/bunny_voxels.npy"
 VOXEL_RES = 32
@@ -12,11 +16,21 @@ VOXEL_RES = 32
 class SdfViewer(BaseViewer):
     """
     Demo viewer showcasing Polyscope's native SDF visualization
+    With a `mesh_path`, voxels are computed once and then reopened from the asset cache.
     """
 
+    def pre_init(self, mesh_path: Optional[str] = None, **kwargs):
+        self.mesh_path = mesh_path
+
     def post_init(self, **kwargs):
         # Load voxel coordinates
-        voxel_coords = np.load(VOXEL_PATH)
+        if self.mesh_path is not None:
+            from examples.utils.asset_cache import cached_voxels
+
+            voxel_coords = cached_voxels(self.mesh_path, resolution=VOXEL_RES)
+        else:
+            # Memory-mapped: `VoxelSet` makes the only in-memory copy
+            voxel_coords, _ = load_array(VOXEL_PATH)
 
         # Create a voxel set
         self.voxel_set = VoxelSet(voxel_coords, VOXEL_RES, -1.0, 1.0)
@@ -32,6 +46,16 @@ class SdfViewer(BaseViewer):
 
         self.voxel_set.gui()
 
+        # Sculpt by removing the selected voxels (without re-creating the set)
+        if psim.Button("Delete selection##voxelset_viewer"):
+            self.voxel_set.remove_voxels(np.flatnonzero(self.voxel_set.selection_mask))
+        psim.SameLine()
+        psim.Text(f"Voxels: {self.voxel_set.num_voxels}/{self.voxel_set.capacity}")
+
 
 if __name__ == "__main__":
-    SdfViewer()
+    parser = ArgumentParser()
+    parser.add_argument("--mesh_path", type=str, default=None)
+    args = parser.parse_args()
+
+    SdfViewer(mesh_path=args.mesh_path)
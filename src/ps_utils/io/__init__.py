@@ -0,0 +1,2 @@
+from ps_utils.io.load_utils import *
+from ps_utils.io.write_utils import *
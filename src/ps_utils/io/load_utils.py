@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import os
+import time
+
+import numpy as np
+
+DEFAULT_CHUNK_BYTES = 64 * 1024**2
+
+
+def get_rss_bytes() -> Optional[int]:
+    """
+    Returns the resident memory of the current process (None if unavailable, e.g., not on Linux).
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@dataclass
+class LoadStats:
+    path: str
+    file_nbytes: int
+    nbytes: int  # Size of the returned array (0 for memmaps)
+    load_time: float  # In seconds
+    rss_before: Optional[int] = None
+    rss_after: Optional[int] = None
+
+    @property
+    def rss_delta(self) -> Optional[int]:
+        if self.rss_before is None or self.rss_after is None:
+            return None
+        return self.rss_after - self.rss_before
+
+    def __str__(self) -> str:
+        text = f"Loaded {os.path.basename(self.path)} ({1e-6 * self.file_nbytes:.1f} MB) in {1e3 * self.load_time:.1f} ms"
+        if self.rss_after is not None:
+            text += f"; RSS: {1e-6 * self.rss_after:.1f} MB ({1e-6 * self.rss_delta:+.1f} MB)"
+        return text
+
+
+def convert_chunked(
+    array: np.ndarray,
+    dtype=np.float32,
+    out: Optional[np.ndarray] = None,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> np.ndarray:
+    """
+    Converts `array` (e.g., a memmap) into a contiguous `dtype` array, `chunk_bytes` of the source
+    at a time along the first axis: only the converted array is allocated (no full-size temporaries)
+    and a memmapped source is read sequentially.
+    """
+    if out is None:
+        out = np.empty(array.shape, dtype=dtype)
+    if array.ndim == 0 or array.size == 0:
+        out[...] = array
+        return out
+
+    num_rows = max(1, chunk_bytes // max(1, array[0].nbytes))
+    for i0 in range(0, len(array), num_rows):
+        out[i0 : i0 + num_rows] = array[i0 : i0 + num_rows]
+    return out
+
+
+def as_contiguous(
+    array: np.ndarray, dtype=np.float32, chunk_bytes: int = DEFAULT_CHUNK_BYTES
+) -> np.ndarray:
+    """
+    Returns `array` itself if it already is a C-contiguous `dtype` array (memmaps included),
+    a chunked conversion (see `convert_chunked`) otherwise.
+    """
+    if array.dtype == dtype and array.flags["C_CONTIGUOUS"]:
+        return array
+    return convert_chunked(array, dtype=dtype, chunk_bytes=chunk_bytes)
+
+
+def load_array(
+    path: str,
+    dtype=None,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    verbose: bool = True,
+) -> Tuple[np.ndarray, LoadStats]:
+    """
+    Opens the `.npy` at `path` as a read-only memmap: the file is only read when accessed.
+    With a `dtype`, e.g., `np.float32` for polyscope, the array is converted in chunks
+    into a contiguous in-memory array, unless it already matches (see `as_contiguous`).
+    Returns the array and its `LoadStats` (printed with `verbose`).
+    """
+    rss_before = get_rss_bytes()
+    start = time.perf_counter()
+
+    array = np.load(path, mmap_mode="r")
+    if dtype is not None:
+        array = as_contiguous(array, dtype=dtype, chunk_bytes=chunk_bytes)
+
+    stats = LoadStats(
+        path=path,
+        file_nbytes=os.path.getsize(path),
+        nbytes=0 if isinstance(array, np.memmap) else array.nbytes,
+        load_time=time.perf_counter() - start,
+        rss_before=rss_before,
+        rss_after=get_rss_bytes(),
+    )
+    if verbose:
+        print(stats)
+    return array, stats
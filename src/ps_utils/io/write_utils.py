@@ -0,0 +1,40 @@
+from typing import Any
+import os
+import threading
+
+import numpy as np
+
+
+def write_atomic(path: str, payload: Any) -> None:
+    """
+    Writes `payload` to a temporary file next to `path` and renames it to `path`.
+    `payload` can be a numpy array (saved with `np.save`), bytes, a string or
+    a callable writing to the path it is given (e.g., `lambda p: torch.save(ckpt, p)`).
+    """
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    # Keep the extension as some writers infer the format from it
+    stem, extension = os.path.splitext(os.path.basename(path))
+    tmp_path = os.path.join(
+        folder, f".{stem}.{os.getpid()}_{threading.get_ident()}.tmp{extension}"
+    )
+
+    try:
+        if callable(payload):
+            payload(tmp_path)
+        else:
+            with open(tmp_path, "wb") as f:
+                if isinstance(payload, np.ndarray):
+                    np.save(f, payload)
+                elif isinstance(payload, (bytes, bytearray, memoryview)):
+                    f.write(payload)
+                elif isinstance(payload, str):
+                    f.write(payload.encode("utf-8"))
+                else:
+                    raise TypeError(f"Unsupported payload: {type(payload).__name__}")
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -1,2 +1,6 @@
 from ps_utils.structures.bbox import *
+from ps_utils.structures.bit_mask import *
+from ps_utils.structures.voxel_index import *
 from ps_utils.structures.voxel_set import *
+from ps_utils.structures.chunked_voxel_set import *
+from ps_utils.structures.volume_lod import *
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import numpy as np
 import polyscope as ps
 
@@ -79,3 +81,170 @@ def create_bbox(
     )
 
     return bbox
+
+
+def bbox_nodes_np(
+    bbox_mins: np.ndarray,
+    bbox_maxs: np.ndarray,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Returns the (8 * K, 3) corners of K boxes given as (K, 3) min/max arrays.
+    If provided, corners are written in place into `out`.
+    """
+    nodes = out if out is not None else np.empty((8 * len(bbox_mins), 3))
+    nodes_view = nodes.reshape(-1, 8, 3)
+    np.multiply(
+        (bbox_maxs - bbox_mins)[:, None, :],
+        CUBE_VERTICES_NP[None, :, :],
+        out=nodes_view,
+    )
+    nodes_view += bbox_mins[:, None, :]
+    return nodes
+
+
+def bbox_edges_np(num_bboxes: int) -> np.ndarray:
+    """
+    Returns the (12 * K, 2) edges of K boxes whose corners are given by `bbox_nodes_np`.
+    """
+    return (
+        CUBE_EDGES_NP[None, :, :] + 8 * np.arange(num_bboxes)[:, None, None]
+    ).reshape(-1, 2)
+
+
+class BBoxSet:
+    """
+    Registers K boxes as a single curve network (instead of one structure per box).
+    Box extents, per-box colors and per-box scalars can be updated in place every frame.
+    """
+
+    def __init__(
+        self,
+        bbox_mins: np.ndarray,
+        bbox_maxs: np.ndarray,
+        edge_radius: float = 0.005,
+        name: str = "bboxes",
+        enabled: bool = True,
+        colors: Optional[np.ndarray] = None,  # (K, 3)
+        scalars: Optional[np.ndarray] = None,  # (K,)
+    ) -> None:
+        self.name = name
+        self.edge_radius = edge_radius
+        self.enabled = enabled
+        self.register(bbox_mins, bbox_maxs)
+
+        self.colors_buffer = None
+        self.scalars_buffer = None
+        self.scalars_kwargs = {}  # Re-used when scalars are re-added (see `update`)
+        if colors is not None:
+            self.set_colors(colors)
+        if scalars is not None:
+            self.set_scalars(scalars)
+
+    def __len__(self) -> int:
+        return len(self.nodes) // 8
+
+    def register(self, bbox_mins: np.ndarray, bbox_maxs: np.ndarray) -> None:
+        self.nodes = bbox_nodes_np(bbox_mins, bbox_maxs)
+        self.ps_bboxes = ps.register_curve_network(
+            self.name,
+            self.nodes,
+            bbox_edges_np(len(bbox_mins)),
+            enabled=self.enabled,
+            radius=self.edge_radius,
+        )
+
+    def update(
+        self,
+        bbox_mins: np.ndarray,
+        bbox_maxs: np.ndarray,
+        colors: Optional[np.ndarray] = None,  # (K, 3)
+        scalars: Optional[np.ndarray] = None,  # (K,)
+    ) -> None:
+        """
+        Updates box extents (and optionally colors/scalars) in place.
+        If the number of boxes changed, the curve network is re-registered and its color/scalar
+        quantities are re-added: `colors`/`scalars` are then required if they were set before.
+        """
+        if len(bbox_mins) != len(self):
+            if self.colors_buffer is not None and colors is None:
+                raise ValueError(
+                    f"Number of boxes changed ({len(self)} -> {len(bbox_mins)}): new colors are required"
+                )
+            if self.scalars_buffer is not None and scalars is None:
+                raise ValueError(
+                    f"Number of boxes changed ({len(self)} -> {len(bbox_mins)}): new scalars are required"
+                )
+            self.register(bbox_mins, bbox_maxs)
+            self.colors_buffer = None
+            self.scalars_buffer = None
+        else:
+            bbox_nodes_np(bbox_mins, bbox_maxs, out=self.nodes)
+            self.ps_bboxes.update_node_positions(self.nodes)
+
+        if colors is not None:
+            self.set_colors(colors)
+        if scalars is not None:
+            self.set_scalars(scalars, **self.scalars_kwargs)
+
+    def set_colors(self, colors: np.ndarray) -> None:
+        """
+        Sets per-box colors (K, 3).
+        """
+        edge_colors = np.repeat(colors, len(CUBE_EDGES_NP), axis=0)
+        if self.colors_buffer is None:
+            self.ps_bboxes.add_color_quantity(
+                self.name + "colors", edge_colors, defined_on="edges", enabled=True
+            )
+            self.colors_buffer = self.ps_bboxes.get_quantity_buffer(
+                self.name + "colors", "colors"
+            )
+        else:
+            self.colors_buffer.update_data_from_host(edge_colors)
+
+    def set_scalars(self, scalars: np.ndarray, **kwargs) -> None:
+        """
+        Sets per-box scalars (K,). `kwargs` are forwarded to `add_scalar_quantity` on creation.
+        """
+        edge_scalars = np.repeat(scalars, len(CUBE_EDGES_NP), axis=0)
+        if self.scalars_buffer is None:
+            self.scalars_kwargs = kwargs
+            self.ps_bboxes.add_scalar_quantity(
+                self.name + "scalars",
+                edge_scalars,
+                defined_on="edges",
+                enabled=True,
+                **kwargs,
+            )
+            self.scalars_buffer = self.ps_bboxes.get_quantity_buffer(
+                self.name + "scalars", "values"
+            )
+        else:
+            self.scalars_buffer.update_data_from_host(edge_scalars)
+
+    def set_enabled(self, val: bool = True):
+        self.enabled = val
+        self.ps_bboxes.set_enabled(val)
+
+
+def create_bboxes(
+    bbox_mins: np.ndarray,
+    bbox_maxs: np.ndarray,
+    edge_radius: float = 0.005,
+    suffix: str = "",
+    enabled: bool = True,
+    colors: Optional[np.ndarray] = None,
+    scalars: Optional[np.ndarray] = None,
+) -> BBoxSet:
+    """
+    Batched version of `create_bbox` taking (K, 3) min/max arrays.
+    """
+    return BBoxSet(
+        bbox_mins,
+        bbox_maxs,
+        edge_radius=edge_radius,
+        name=f"bboxes{suffix}",
+        enabled=enabled,
+        colors=colors,
+        scalars=scalars,
+    )
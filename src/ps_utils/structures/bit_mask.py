@@ -0,0 +1,65 @@
+import numpy as np
+from typing import Optional
+
+
+class BitMask:
+    """
+    Bit-packed boolean mask (8 entries per byte).
+    Supports the numpy indexing used by voxel sets: `mask[ids]` returns a boolean array
+    and `mask[ids] = values` sets entries (`ids` can be an index array or a slice).
+    """
+
+    def __init__(self, size: int, values: Optional[np.ndarray] = None) -> None:
+        self.size = size
+        self.bits = np.zeros((size + 7) // 8, dtype=np.uint8)
+        if values is not None:
+            self[:] = values
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        values = self[:]
+        return values if dtype is None else values.astype(dtype)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def sum(self) -> int:
+        return int(np.unpackbits(self.bits, count=self.size).sum())
+
+    def _ids(self, key) -> np.ndarray:
+        if isinstance(key, slice):
+            return np.arange(self.size)[key]
+        key = np.asarray(key)
+        if key.dtype == bool:
+            return np.flatnonzero(key)
+        return key.astype(np.int64)
+
+    def __getitem__(self, key) -> np.ndarray:
+        if isinstance(key, slice) and key == slice(None):
+            return np.unpackbits(self.bits, count=self.size).astype(bool)
+        ids = self._ids(key)
+        return ((self.bits[ids >> 3] >> (7 - (ids & 7))) & 1).astype(bool)
+
+    def __setitem__(self, key, values) -> None:
+        values = np.asarray(values, dtype=bool)
+        if isinstance(key, slice) and key == slice(None):
+            self.bits = np.packbits(np.broadcast_to(values, (self.size,)))
+            return
+
+        ids = self._ids(key)
+        values = np.broadcast_to(values, ids.shape)
+        # NB: `ufunc.at` so that several ids in the same byte are all applied
+        set_ids, clear_ids = ids[values], ids[~values]
+        np.bitwise_or.at(
+            self.bits,
+            set_ids >> 3,
+            (128 >> (set_ids & 7)).astype(np.uint8),
+        )
+        np.bitwise_and.at(
+            self.bits,
+            clear_ids >> 3,
+            ~(128 >> (clear_ids & 7)).astype(np.uint8),
+        )
@@ -0,0 +1,362 @@
+import itertools
+from functools import partial
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import polyscope as ps
+import polyscope.imgui as psim
+
+from ps_utils.structures import CUBE_VERTICES_NP
+from ps_utils.structures.voxel_set import (
+    BRUSH_MODE_INVMAP,
+    BRUSH_MODE_MAP,
+    DEFAULT_BASE_COLOR,
+    DEFAULT_BRUSH_MODE,
+    DEFAULT_HOVER_ADD_COLOR,
+    DEFAULT_HOVER_REMOVE_COLOR,
+    DEFAULT_SELECTED_COLOR,
+    DEFAULT_SELECTION_RADIUS,
+    MAX_SELECTION_RADIUS,
+    MIN_SELECTION_RADIUS,
+    SELECTION_RADIUS_SENTIVITY,
+    BrushMode,
+    MeshMode,
+    VoxelSet,
+)
+from ps_utils.ui import KEY_HANDLER, choice_slider
+
+DEFAULT_BRICK_SIZE = 32
+
+BrickKey = Tuple[int, int, int]
+
+
+class ChunkedVoxelSet:
+    """
+    ChunkedVoxelSet splits a large set of voxels into bricks of `brick_size`^3 voxels,
+    each registered as its own `VoxelSet`. Meshes are built one brick at a time.
+    Brush edits and color updates only touch the bricks intersecting the brush.
+    Bricks outside the view frustum, or fully hidden by their neighbors, are disabled.
+    """
+
+    def __init__(
+        self,
+        coords: np.ndarray,
+        voxel_res: int,
+        bbox_min: float,
+        bbox_max: float,
+        name: str = "chunked_voxel_set",
+        offset: Optional[np.ndarray] = None,
+        selection_mask: Optional[np.ndarray] = None,  # initial set of selected voxels
+        brick_size: int = DEFAULT_BRICK_SIZE,
+        cull_bricks: bool = True,  # Whether to disable invisible bricks
+        # UI-related parameters
+        selection_radius: Union[int, float] = DEFAULT_SELECTION_RADIUS,
+        brush_mode: BrushMode = DEFAULT_BRUSH_MODE,  # (ADD or REMOVE)
+        square_brush: bool = True,  # Whether to include voxels in a square or sphere
+        base_color: np.ndarray = DEFAULT_BASE_COLOR,
+        selected_color: np.ndarray = DEFAULT_SELECTED_COLOR,
+        hover_add_color: np.ndarray = DEFAULT_HOVER_ADD_COLOR,
+        hover_remove_color: np.ndarray = DEFAULT_HOVER_REMOVE_COLOR,
+        mesh_mode: MeshMode = MeshMode.CULLED,
+        compact_memory: bool = False,  # Whether to pack coordinates, masks and meshes
+    ):
+        # Check that the provided coordinates are valid!
+        assert coords.min() >= 0 and coords.min() < voxel_res
+
+        self.name = name
+        self.num_voxels = len(coords)
+        self.brick_size = brick_size
+        self.cull_bricks = cull_bricks
+        self.selection_radius = selection_radius
+        self.brush_mode = brush_mode
+        self.square_brush = square_brush
+        self.enabled = True
+        # `MeshMode.GREEDY` is display only (see `VoxelSet`)
+        self.interactive = mesh_mode != MeshMode.GREEDY
+
+        # Time stamp tracking
+        self.last_selected_voxel = None
+        self.selection_changed = False
+        self.last_hover_state = None
+        self.hovered_bricks = set()
+        self.last_view_mat = None
+
+        voxel_size = (bbox_max - bbox_min) / float(voxel_res)
+        world_offset = (
+            np.zeros(3) if offset is None else np.asarray(offset, dtype=float)
+        )
+
+        # Group voxels by brick
+        brick_coords = coords // brick_size
+        num_bricks = int(brick_coords.max()) + 1
+        brick_keys = (
+            brick_coords[:, 0] * num_bricks + brick_coords[:, 1]
+        ) * num_bricks + brick_coords[:, 2]
+        order = np.argsort(brick_keys, kind="stable")
+        splits = np.flatnonzero(np.diff(brick_keys[order])) + 1
+
+        self.bricks: Dict[BrickKey, VoxelSet] = {}
+        self.brick_voxel_ids: Dict[BrickKey, np.ndarray] = {}
+        for voxel_ids in np.split(order, splits):
+            key = tuple(int(x) for x in brick_coords[voxel_ids[0]])
+            origin = self.brick_origin(key)
+            self.bricks[key] = VoxelSet(
+                coords[voxel_ids] - origin,
+                brick_size,
+                bbox_min,
+                bbox_min + brick_size * voxel_size,
+                name=f"{name}_{key[0]}_{key[1]}_{key[2]}",
+                offset=world_offset + voxel_size * origin,
+                selection_mask=(
+                    selection_mask[voxel_ids].copy()
+                    if selection_mask is not None
+                    else None
+                ),
+                selection_radius=selection_radius,
+                brush_mode=brush_mode,
+                square_brush=square_brush,
+                base_color=base_color,
+                selected_color=selected_color,
+                hover_add_color=hover_add_color,
+                hover_remove_color=hover_remove_color,
+                mesh_mode=mesh_mode,
+                compact_memory=compact_memory,
+            )
+            self.bricks[key].set_hover_callback(partial(self.hover_callback, key))
+            self.brick_voxel_ids[key] = voxel_ids
+
+        # World-space corners of each brick (for frustum culling)
+        self.brick_keys = list(self.bricks.keys())
+        brick_extent = voxel_size * brick_size
+        self.brick_corners = (
+            np.array(self.brick_keys, dtype=float)[:, None, :]
+            + CUBE_VERTICES_NP[None, :, :]
+        ) * brick_extent + (bbox_min - 0.5 * voxel_size + world_offset)
+
+        # Full bricks surrounded by full bricks can never be seen
+        self.hidden_bricks = set(
+            key
+            for key in self.brick_keys
+            if self.is_full(key)
+            and all(
+                self.is_full(tuple(np.add(key, direction)))
+                for direction in itertools.chain(
+                    np.eye(3, dtype=int), -np.eye(3, dtype=int)
+                )
+            )
+        )
+        self.visible_bricks = set(self.brick_keys)
+        self.update_visibility()
+
+    def brick_origin(self, key: BrickKey) -> np.ndarray:
+        return self.brick_size * np.array(key)
+
+    def is_full(self, key: BrickKey) -> bool:
+        return key in self.bricks and self.bricks[key].num_voxels == self.brick_size**3
+
+    def get_selection_mask(self) -> np.ndarray:
+        """
+        Returns the selection mask in the order of the `coords` the set was created with.
+        """
+        selection_mask = np.zeros(self.num_voxels, dtype=bool)
+        for key, brick in self.bricks.items():
+            selection_mask[self.brick_voxel_ids[key]] = brick.selection_mask[:]
+        return selection_mask
+
+    # ===============
+    # VISIBILITY
+    # ===============
+
+    def frustum_culled_bricks(self) -> np.ndarray:
+        """
+        Returns a mask of the bricks that lie entirely outside the view frustum.
+        """
+        camera_parameters = ps.get_view_camera_parameters()
+        view_mat = camera_parameters.get_view_mat()
+
+        corners = (
+            self.brick_corners @ view_mat[:3, :3].T + view_mat[:3, 3]
+        )  # (B, 8, 3) in view space
+        x, y, depth = corners[..., 0], corners[..., 1], -corners[..., 2]
+        tan_y = np.tan(0.5 * np.deg2rad(camera_parameters.get_fov_vertical_deg()))
+        tan_x = tan_y * camera_parameters.get_aspect()
+
+        # A brick is culled if all its corners are outside the same plane
+        outside = np.stack(
+            [
+                depth <= 0.0,
+                x > tan_x * depth,
+                x < -tan_x * depth,
+                y > tan_y * depth,
+                y < -tan_y * depth,
+            ],
+            axis=0,
+        )
+        return outside.all(-1).any(0)
+
+    def update_visibility(self, force: bool = False) -> None:
+        """
+        Enables the visible bricks only. Frustum culling is only recomputed when the view changes.
+        """
+        if self.cull_bricks and self.enabled:
+            view_mat = ps.get_view_camera_parameters().get_view_mat()
+            if (
+                not force
+                and self.last_view_mat is not None
+                and np.array_equal(view_mat, self.last_view_mat)
+            ):
+                return
+            self.last_view_mat = view_mat
+
+            culled = self.frustum_culled_bricks()
+            visible_bricks = set(
+                key
+                for key, is_culled in zip(self.brick_keys, culled)
+                if not is_culled and key not in self.hidden_bricks
+            )
+        else:
+            self.last_view_mat = None
+            visible_bricks = set(self.brick_keys) if self.enabled else set()
+
+        for key in visible_bricks ^ self.visible_bricks:
+            self.bricks[key].set_enabled(key in visible_bricks)
+        self.visible_bricks = visible_bricks
+
+    # ===============
+    # BRUSH
+    # ===============
+
+    def sync_bricks(self) -> None:
+        for brick in self.bricks.values():
+            brick.selection_radius = self.selection_radius
+            brick.brush_mode = self.brush_mode
+            brick.square_brush = self.square_brush
+
+    def hover_callback(
+        self, brick_key: BrickKey, mesh_element: ps.MeshElement, index: int
+    ):
+        hovered_brick = self.bricks[brick_key]
+        voxel_id = hovered_brick.hovered_voxel_id(mesh_element, index)
+        if voxel_id is None:
+            return
+
+        clicked = (
+            psim.IsMouseClicked(0)
+            and psim.GetIO().KeyAlt
+            and (brick_key, voxel_id) != self.last_selected_voxel
+        )
+
+        # Nothing to recolor if the brush didn't move
+        hover_state = (
+            brick_key,
+            voxel_id,
+            self.selection_radius,
+            self.square_brush,
+            self.brush_mode,
+        )
+        if not clicked and hover_state == self.last_hover_state:
+            return
+
+        center = hovered_brick.coords[voxel_id] + self.brick_origin(brick_key)
+
+        # Only visit the bricks intersecting the bounding box of the brush
+        half_extent = int(np.ceil(self.selection_radius)) - 1
+        brick_min = (center - half_extent) // self.brick_size
+        brick_max = (center + half_extent) // self.brick_size
+        hovered_bricks = set()
+        for key in itertools.product(
+            *[range(brick_min[i], brick_max[i] + 1) for i in range(3)]
+        ):
+            if key not in self.bricks:
+                continue
+            brick = self.bricks[key]
+            within_radius = brick.brush_ids(center - self.brick_origin(key))
+
+            changed_ids = np.zeros(0, dtype=np.int64)
+            if clicked:
+                brick.selection_mask[within_radius] = self.brush_mode == BrushMode.ADD
+                changed_ids = within_radius
+
+            brick.update_selection_buffer(within_radius, changed_ids)
+            hovered_bricks.add(key)
+
+        # Clear the hover state of the bricks the brush left
+        for key in self.hovered_bricks - hovered_bricks:
+            self.bricks[key].update_selection_buffer(None, np.zeros(0, dtype=np.int64))
+        self.hovered_bricks = hovered_bricks
+
+        if clicked:
+            self.last_selected_voxel = (brick_key, voxel_id)
+            self.selection_changed = True
+
+        self.last_hover_state = hover_state
+
+    # ===============
+    # GUI
+    # ===============
+
+    def gui(self) -> bool:
+        update = False
+
+        psim.SeparatorText(f"{self.name}##chunked_voxel_set")
+
+        io = psim.GetIO()
+
+        # Use wheel to increase/decrease brush radius
+        if io.MouseWheel != 0 and io.KeyAlt:
+            self.selection_radius += SELECTION_RADIUS_SENTIVITY * float(io.MouseWheel)
+        self.selection_radius = max(
+            MIN_SELECTION_RADIUS,
+            min(self.selection_radius, MAX_SELECTION_RADIUS),
+        )
+
+        if self.interactive:
+            if psim.Button(f"Reset##chunked_voxel_set_{self.name}"):
+                for brick in self.bricks.values():
+                    brick.selection_mask[:] = False
+                    brick.update_selection_buffer()
+                update |= True
+
+            psim.SameLine()
+            if psim.Button(f"Invert##chunked_voxel_set_{self.name}"):
+                for brick in self.bricks.values():
+                    brick.selection_mask[:] = ~brick.selection_mask[:] & brick.active
+                    brick.update_selection_buffer()
+                update |= True
+
+            # Switch selection
+            if KEY_HANDLER("s"):
+                self.brush_mode = BRUSH_MODE_INVMAP[1 - BRUSH_MODE_MAP[self.brush_mode]]
+
+            _, self.brush_mode = choice_slider(
+                f"Brush Mode##chunked_voxel_set_{self.name}",
+                self.brush_mode,
+                BRUSH_MODE_MAP,
+                BRUSH_MODE_INVMAP,
+            )
+
+            _, self.square_brush = psim.Checkbox(
+                f"Square##chunked_voxel_set_{self.name}", self.square_brush
+            )
+            psim.SameLine()
+            psim.Text(f"Radius: {self.selection_radius}")
+        else:
+            psim.Text("Greedy mesh: display only (no selection)")
+
+        clicked, self.cull_bricks = psim.Checkbox(
+            f"Cull bricks##chunked_voxel_set_{self.name}", self.cull_bricks
+        )
+        psim.SameLine()
+        psim.Text(f"Visible bricks: {len(self.visible_bricks)}/{len(self.bricks)}")
+
+        self.sync_bricks()
+        self.update_visibility(force=clicked)
+
+        # Notify parent if something changed
+        update |= self.selection_changed
+        self.selection_changed = False
+        return update
+
+    def set_enabled(self, val: bool = True):
+        self.enabled = val
+        self.update_visibility(force=True)
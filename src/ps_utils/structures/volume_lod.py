@@ -0,0 +1,224 @@
+from enum import Enum
+from typing import List, Optional, Sequence
+import time
+
+import numpy as np
+import polyscope as ps
+import polyscope.imgui as psim
+
+
+class LodReduction(Enum):
+    """
+    How a coarse node reduces the 3^3 fine nodes centered on it (for SDFs, with inside < 0):
+    - NODE keeps the fine value at the coarse node: every node keeps its sign, so the zero level set
+      doesn't move between levels (features thinner than a coarse cell can vanish),
+    - MIN keeps the minimum: the coarse inside contains the fine one (thin features are kept, the surface
+      is dilated by up to one fine cell), MAX keeps the maximum (the opposite),
+    - MIN_ABS keeps the signed value closest to 0 (the surface is kept close, but signs can flip near it),
+    - MEAN smooths the values.
+    """
+
+    NODE = "node"
+    MIN = "min"
+    MAX = "max"
+    MIN_ABS = "min_abs"
+    MEAN = "mean"
+
+
+DEFAULT_INTERACTION_RES = 64  # Max dimension of the level shown during interactions
+DEFAULT_SETTLE_TIME = 0.25  # Seconds before showing the full resolution again
+DEFAULT_REDUCTION = LodReduction.NODE
+
+
+def reduce_axis(values: np.ndarray, axis: int, reduction: LodReduction) -> np.ndarray:
+    """
+    Halves the resolution of `values` along `axis`: coarse node `i` reduces fine nodes
+    `[2 * i - 1, 2 * i + 1]` (edges are replicated).
+    """
+    n = values.shape[axis]
+    m = (n + 1) // 2
+    pad = [(0, 0)] * values.ndim
+    pad[axis] = (1, 2 * m - n)
+    padded = np.pad(values, pad, mode="edge")
+    before, node, after = (
+        padded[(slice(None),) * axis + (slice(k, k + 2 * m - 1, 2),)] for k in range(3)
+    )
+
+    if reduction == LodReduction.MIN:
+        return np.minimum(np.minimum(before, node), after)
+    elif reduction == LodReduction.MAX:
+        return np.maximum(np.maximum(before, node), after)
+    elif reduction == LodReduction.MIN_ABS:
+        closest = np.where(np.abs(before) < np.abs(node), before, node)
+        return np.where(np.abs(after) < np.abs(closest), after, closest)
+    return ((before + node + after) / 3).astype(values.dtype)
+
+
+def downsample_nodes(
+    values: np.ndarray, reduction: LodReduction = DEFAULT_REDUCTION
+) -> np.ndarray:
+    """
+    Halves the resolution of a node grid (nx, ny, nz): coarse node `i` lies on fine node `2 * i`
+    and reduces the 3^3 fine nodes centered on it (see `LodReduction`).
+    """
+    if reduction == LodReduction.NODE:
+        return np.ascontiguousarray(values[::2, ::2, ::2])
+    # The reductions are separable: reduce one axis at a time
+    for axis in range(values.ndim):
+        values = reduce_axis(values, axis, reduction)
+    return np.ascontiguousarray(values)
+
+
+def build_pyramid(
+    values: np.ndarray,
+    min_res: int = DEFAULT_INTERACTION_RES,
+    reduction: LodReduction = DEFAULT_REDUCTION,
+) -> List[np.ndarray]:
+    """
+    Returns `[values, values / 2, ...]` down to the first level whose dimensions are all <= `min_res`.
+    """
+    levels = [values]
+    while max(levels[-1].shape) > min_res and min(levels[-1].shape) > 2:
+        levels.append(downsample_nodes(levels[-1], reduction))
+    return levels
+
+
+class VolumeLod:
+    """
+    Scalar volume (e.g., an SDF) registered as a pyramid of node grids that is built once.
+    While the isosurface level (see `gui`) or one of `slice_planes` changes, the coarsest level is shown;
+    after `settle_time` seconds without interaction, the full-resolution level is swapped back in.
+    Every level is registered once and switching levels only enables/disables grids, so that
+    the isosurface of the full-resolution level is only extracted when interactions stop.
+    `quantity_kwargs` are forwarded to `add_scalar_quantity` (e.g., `isolines_enabled=True`).
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        bound_low: Sequence[float],
+        bound_high: Sequence[float],
+        name: str = "volume_lod",
+        quantity_name: str = "values",
+        isosurface_level: float = 0.0,
+        interaction_res: int = DEFAULT_INTERACTION_RES,
+        reduction: LodReduction = DEFAULT_REDUCTION,
+        settle_time: float = DEFAULT_SETTLE_TIME,
+        slice_planes: Sequence = (),
+        levels: Optional[List[np.ndarray]] = None,  # See `build_pyramid`
+        **quantity_kwargs,
+    ):
+        self.name = name
+        self.isosurface_level = isosurface_level
+        self.settle_time = settle_time
+        self.slice_planes = list(slice_planes)
+        self.adaptive = True
+        self.enabled = True
+
+        self.levels = (
+            build_pyramid(values, interaction_res, reduction)
+            if levels is None
+            else levels
+        )
+        self.value_range = (float(values.min()), float(values.max()))
+
+        # Coarse node `j` of level `i` lies on fine node `j * 2^i` (the center of the nodes it reduces):
+        # the bounds of a level start on the first node and end on its last node
+        bound_low = np.asarray(bound_low, dtype=np.float64)
+        spacing = (np.asarray(bound_high, dtype=np.float64) - bound_low) / (
+            np.array(values.shape) - 1
+        )
+        self.grids = []
+        self.quantities = []
+        for i, level in enumerate(self.levels):
+            level_bound_high = bound_low + (np.array(level.shape) - 1) * spacing * 2**i
+            grid = ps.register_volume_grid(
+                f"{name}_{i}", level.shape, bound_low, level_bound_high
+            )
+            quantity = grid.add_scalar_quantity(
+                quantity_name,
+                level,
+                defined_on="nodes",
+                enable_isosurface_viz=True,
+                isosurface_level=isosurface_level,
+                enabled=True,
+                **quantity_kwargs,
+            )
+            grid.set_enabled(i == 0)
+            self.grids.append(grid)
+            self.quantities.append(quantity)
+        self.level_isovalues = [isosurface_level] * len(self.levels)
+
+        # Interaction tracking
+        self.active_level = 0
+        self.last_interaction = -np.inf
+        self.last_planes = None
+
+    @property
+    def coarse_level(self) -> int:
+        return len(self.levels) - 1
+
+    @property
+    def num_nodes(self) -> int:
+        return self.levels[self.active_level].size
+
+    def set_level(self, level: int) -> None:
+        # Extract the isosurface of the level (if needed) before showing it
+        if self.level_isovalues[level] != self.isosurface_level:
+            self.quantities[level].set_isosurface_level(self.isosurface_level)
+            self.level_isovalues[level] = self.isosurface_level
+        if level != self.active_level:
+            self.grids[self.active_level].set_enabled(False)
+            self.grids[level].set_enabled(self.enabled)
+            self.active_level = level
+
+    def set_isosurface_level(self, isosurface_level: float) -> None:
+        if isosurface_level != self.isosurface_level:
+            self.isosurface_level = isosurface_level
+            self.notify_interaction()
+
+    def notify_interaction(self) -> None:
+        self.last_interaction = time.perf_counter()
+
+    def poll_slice_planes(self) -> None:
+        planes = [
+            (tuple(plane.get_center()), tuple(plane.get_normal()))
+            for plane in self.slice_planes
+        ]
+        if self.last_planes is not None and planes != self.last_planes:
+            self.notify_interaction()
+        self.last_planes = planes
+
+    def update(self) -> None:
+        """
+        Shows the coarse level during interactions and the full resolution once they settled.
+        """
+        self.poll_slice_planes()
+        interacting = time.perf_counter() - self.last_interaction < self.settle_time
+        self.set_level(self.coarse_level if self.adaptive and interacting else 0)
+
+    def gui(self) -> None:
+        psim.SeparatorText(f"{self.name}##volume_lod")
+
+        changed, isosurface_level = psim.SliderFloat(
+            f"Isosurface level##volume_lod_{self.name}",
+            self.isosurface_level,
+            v_min=self.value_range[0],
+            v_max=self.value_range[1],
+        )
+        if changed or psim.IsItemActive():
+            self.set_isosurface_level(isosurface_level)
+            self.notify_interaction()
+
+        _, self.adaptive = psim.Checkbox(
+            f"Adaptive LOD##volume_lod_{self.name}", self.adaptive
+        )
+        psim.SameLine()
+        dims = "x".join(str(n) for n in self.levels[self.active_level].shape)
+        psim.Text(f"Level: {self.active_level}/{self.coarse_level} ({dims})")
+
+        self.update()
+
+    def set_enabled(self, val: bool = True) -> None:
+        self.enabled = val
+        self.grids[self.active_level].set_enabled(val)
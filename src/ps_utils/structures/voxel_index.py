@@ -0,0 +1,144 @@
+import numpy as np
+from typing import Union
+
+# Above this number of cells, the dense grid is replaced by a sorted key index
+# (128^3 int32 cells = 8MB)
+DENSE_INDEX_MAX_CELLS = 128**3
+
+
+def concatenate_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of `np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])`.
+    """
+    counts = ends - starts
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return np.arange(counts.sum()) + offsets
+
+
+class VoxelIndex:
+    """
+    Spatial acceleration structure mapping integer voxel coordinates to voxel ids.
+    Small grids use a dense occupancy-to-index grid. Large grids use linearized (x, y, z) keys
+    sorted once, so that a box query only touches the rows of the box with `np.searchsorted`.
+    Either way, brush queries cost the brush volume and not the size of the set.
+    """
+
+    def __init__(
+        self,
+        coords: np.ndarray,
+        voxel_res: int,
+        dense_max_cells: int = DENSE_INDEX_MAX_CELLS,
+    ) -> None:
+        self.coords = coords
+        # NB: coordinates equal to `voxel_res` are tolerated (e.g., padded voxelizations)
+        self.res = max(int(voxel_res), int(coords.max()) + 1 if len(coords) > 0 else 1)
+        self.dense = self.res**3 <= dense_max_cells
+
+        ids = np.arange(len(coords))
+        if self.dense:
+            self.grid = np.full((self.res,) * 3, -1, dtype=np.int32)
+            self.grid[tuple(coords.T)] = ids
+        else:
+            keys = self.linearize(coords)
+            self.order = np.argsort(keys, kind="stable")
+            self.sorted_keys = keys[self.order]
+
+    def insert(self, coords: np.ndarray, ids: np.ndarray) -> None:
+        """
+        Registers new voxels `ids` at `coords` (which must not be occupied and lie within the grid).
+        """
+        if self.dense:
+            self.grid[tuple(coords.T)] = ids
+        else:
+            keys = self.linearize(coords)
+            key_order = np.argsort(keys)
+            pos = np.searchsorted(self.sorted_keys, keys[key_order])
+            self.sorted_keys = np.insert(self.sorted_keys, pos, keys[key_order])
+            self.order = np.insert(self.order, pos, ids[key_order])
+
+    def remove(self, coords: np.ndarray) -> None:
+        """
+        Unregisters the voxels at `coords` (which must be occupied).
+        """
+        if self.dense:
+            self.grid[tuple(coords.T)] = -1
+        else:
+            pos = np.searchsorted(self.sorted_keys, self.linearize(coords))
+            self.sorted_keys = np.delete(self.sorted_keys, pos)
+            self.order = np.delete(self.order, pos)
+
+    @property
+    def nbytes(self) -> int:
+        if self.dense:
+            return self.grid.nbytes
+        return self.sorted_keys.nbytes + self.order.nbytes
+
+    def linearize(self, coords: np.ndarray) -> np.ndarray:
+        coords = coords.astype(np.int64)
+        return (coords[..., 0] * self.res + coords[..., 1]) * self.res + coords[..., 2]
+
+    def lookup(self, coords: np.ndarray) -> np.ndarray:
+        """
+        Returns the ids of the voxels at `coords` (shape (..., 3)), -1 where there are none.
+        """
+        coords = np.asarray(coords)
+        valid = ((coords >= 0) & (coords < self.res)).all(-1)
+        ids = np.full(coords.shape[:-1], -1, dtype=np.int64)
+        if self.dense:
+            ids[valid] = self.grid[tuple(coords[valid].T)]
+        elif len(self.sorted_keys) > 0:
+            keys = self.linearize(coords[valid])
+            pos = np.searchsorted(self.sorted_keys, keys)
+            pos = np.minimum(pos, len(self.sorted_keys) - 1)
+            found = self.sorted_keys[pos] == keys
+            ids[valid] = np.where(found, self.order[pos], -1)
+        return ids
+
+    def query_box(self, center: np.ndarray, half_extent: int) -> np.ndarray:
+        """
+        Returns the ids of the voxels `v` such that `max(abs(v - center)) <= half_extent`.
+        """
+        # NB: int64 so that packed coordinates don't underflow
+        center = np.asarray(center, dtype=np.int64)
+        lo = np.maximum(center - half_extent, 0)
+        hi = np.minimum(center + half_extent, self.res - 1)
+        if (lo > hi).any():
+            return np.zeros(0, dtype=np.int64)
+
+        if self.dense:
+            ids = self.grid[
+                lo[0] : hi[0] + 1,
+                lo[1] : hi[1] + 1,
+                lo[2] : hi[2] + 1,
+            ].ravel()
+            return ids[ids >= 0]
+
+        if len(self.sorted_keys) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        # One contiguous range of keys per (x, y) row of the box
+        xs, ys = np.meshgrid(
+            np.arange(lo[0], hi[0] + 1),
+            np.arange(lo[1], hi[1] + 1),
+            indexing="ij",
+        )
+        row_keys = (xs.ravel().astype(np.int64) * self.res + ys.ravel()) * self.res
+        starts = np.searchsorted(self.sorted_keys, row_keys + lo[2])
+        ends = np.searchsorted(self.sorted_keys, row_keys + hi[2] + 1)
+
+        return self.order[concatenate_ranges(starts, ends)]
+
+    def query_square(self, center: np.ndarray, radius: Union[int, float]) -> np.ndarray:
+        """
+        Returns the ids of the voxels `v` such that `max(abs(v - center)) < radius`.
+        """
+        return self.query_box(center, int(np.ceil(radius)) - 1)
+
+    def query_sphere(self, center: np.ndarray, radius: Union[int, float]) -> np.ndarray:
+        """
+        Returns the ids of the voxels `v` such that `sum((v - center) ** 2) < radius ** 2`.
+        """
+        center = np.asarray(center, dtype=np.int64)
+        ids = self.query_box(center, int(np.ceil(radius)) - 1)
+        dist2 = ((self.coords[ids] - center[None, :]) ** 2).sum(1)
+        return ids[dist2 < radius**2]
@@ -2,12 +2,14 @@ import polyscope as ps
 import polyscope.imgui as psim
 import numpy as np
 from enum import Enum
-from typing import Tuple, Optional, Union
+from typing import Dict, Tuple, Optional, Union
 
 from ps_utils.structures import (
     CUBE_VERTICES_NP,
     CUBE_TRIANGLES_NP,
 )
+from ps_utils.structures.bit_mask import BitMask
+from ps_utils.structures.voxel_index import VoxelIndex, concatenate_ranges
 from ps_utils.ui import get_enum_maps, KEY_HANDLER, choice_slider
 
 
@@ -18,6 +20,16 @@ class BrushMode(Enum):
 
 BRUSH_MODE_MAP, BRUSH_MODE_INVMAP, BRUSH_MODE_NAMES, _ = get_enum_maps(BrushMode)
 
+
+class MeshMode(Enum):
+    CUBES = "cubes"  # 12 triangles per voxel
+    CULLED = "culled"  # Only faces between occupied and empty voxels
+    # Culled faces merged into coplanar rectangles, display only (no hover, brush or selection)
+    GREEDY = "greedy"
+
+
+MESH_MODE_MAP, MESH_MODE_INVMAP, MESH_MODE_NAMES, _ = get_enum_maps(MeshMode)
+
 # Brush
 DEFAULT_BRUSH_MODE = BrushMode.ADD
 DEFAULT_SELECTION_RADIUS = 4.0
@@ -31,35 +43,188 @@ DEFAULT_HOVER_REMOVE_COLOR = np.array([1.0, 0.0, 0.0])
 DEFAULT_SELECTED_COLOR = np.array([0.0, 0.0, 1.0])
 DEFAULT_BASE_COLOR = np.array([1.0, 1.0, 1.0])
 
+# Above this fraction of changed voxels, all colors are recomputed at once (on the CPU side)
+FULL_UPDATE_RATIO = 0.25
+# Above this fraction of free slots, removing voxels compacts the pool
+COMPACTION_RATIO = 0.5
 
-def create_voxel_set_np(
+
+def _boundary_quads(
     coords: np.ndarray,
+    index: VoxelIndex,
+    axis: int,
+    sign: int,
+    merge: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the corners (Q, 4, 3) on the lattice of the faces of `coords` pointing to an empty voxel along `sign * axis`
+    and the id of the voxel each face belongs to.
+    If `merge` is set, coplanar faces are greedily merged into rectangles (first along u, then along v).
+    """
+    direction = np.zeros(3, dtype=np.int64)
+    direction[axis] = sign
+    voxel_ids = np.flatnonzero(index.lookup(coords + direction) < 0)
+
+    u_axis, v_axis = (axis + 1) % 3, (axis + 2) % 3
+    # NB: int64 so that packed coordinates don't overflow
+    plane = coords[voxel_ids, axis].astype(np.int64) + (sign > 0)
+    u0 = coords[voxel_ids, u_axis].astype(np.int64)
+    v0 = coords[voxel_ids, v_axis].astype(np.int64)
+    u1, v1 = u0 + 1, v0 + 1
+
+    if merge and len(voxel_ids) > 0:
+        # 1. Merge consecutive faces along u into runs
+        order = np.lexsort((u0, v0, plane))
+        voxel_ids, plane, u0, v0 = voxel_ids[order], plane[order], u0[order], v0[order]
+        new_run = np.ones(len(voxel_ids), dtype=bool)
+        new_run[1:] = (
+            (plane[1:] != plane[:-1]) | (v0[1:] != v0[:-1]) | (u0[1:] != u0[:-1] + 1)
+        )
+        starts = np.flatnonzero(new_run)
+        ends = np.append(starts[1:], len(voxel_ids))
+        u1 = u0[ends - 1] + 1
+        voxel_ids, plane, u0, v0 = (
+            voxel_ids[starts],
+            plane[starts],
+            u0[starts],
+            v0[starts],
+        )
+
+        # 2. Merge consecutive runs with the same extent along v into rectangles
+        order = np.lexsort((v0, u1, u0, plane))
+        voxel_ids, plane, u0, u1, v0 = (
+            voxel_ids[order],
+            plane[order],
+            u0[order],
+            u1[order],
+            v0[order],
+        )
+        new_rect = np.ones(len(voxel_ids), dtype=bool)
+        new_rect[1:] = (
+            (plane[1:] != plane[:-1])
+            | (u0[1:] != u0[:-1])
+            | (u1[1:] != u1[:-1])
+            | (v0[1:] != v0[:-1] + 1)
+        )
+        starts = np.flatnonzero(new_rect)
+        ends = np.append(starts[1:], len(voxel_ids))
+        v1 = v0[ends - 1] + 1
+        voxel_ids, plane, u0, u1, v0 = (
+            voxel_ids[starts],
+            plane[starts],
+            u0[starts],
+            u1[starts],
+            v0[starts],
+        )
+
+    # Counter-clockwise around the outward normal
+    corners = np.empty((len(voxel_ids), 4, 3), dtype=np.int64)
+    corners[:, :, axis] = plane[:, None]
+    corners[:, :, u_axis] = np.stack([u0, u1, u1, u0], axis=1)
+    corners[:, :, v_axis] = np.stack([v0, v0, v1, v1], axis=1)
+    if sign < 0:
+        corners = corners[:, ::-1]
+
+    return corners, voxel_ids
+
+
+def mesh_voxels_np(
+    coords: np.ndarray,
+    mesh_mode: MeshMode = MeshMode.CUBES,
+    index: Optional[VoxelIndex] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Meshes the voxels at `coords` in voxel units (i.e., voxel `i` is centered at `coords[i]`).
+    Returns `vertices, faces, face_to_voxel` where `face_to_voxel` maps each triangle to its voxel.
+    Triangles are sorted by voxel.
+
+    NB: with `MeshMode.GREEDY`, a merged rectangle is mapped to its first voxel only,
+    which is why `VoxelSet` doesn't allow selections in this mode.
+    """
+    if len(coords) == 0:
+        return (
+            np.zeros((0, 3)),
+            np.zeros((0, 3), dtype=np.int64),
+            np.zeros(0, dtype=np.int64),
+        )
+
+    if mesh_mode == MeshMode.CUBES:
+        vertex_offsets = np.repeat(coords, 8, axis=0)
+        cube_vertices = (
+            np.tile(CUBE_VERTICES_NP, (len(coords), 1)) - 0.5
+        )  # Rescale voxels (each center with point cloud)
+        vertices = cube_vertices + vertex_offsets
+
+        # 8 for 8 vertices
+        triangles_offsets = np.repeat(
+            np.tile((8 * np.arange(len(coords)))[:, None], ((1, 3))),
+            len(CUBE_TRIANGLES_NP),
+            axis=0,
+        )
+        faces = np.tile(CUBE_TRIANGLES_NP, (len(coords), 1)) + triangles_offsets
+        face_to_voxel = np.repeat(np.arange(len(coords)), len(CUBE_TRIANGLES_NP))
+
+        return vertices, faces, face_to_voxel
+
+    if index is None:
+        index = VoxelIndex(coords, int(coords.max()) + 1)
+
+    all_corners, all_voxel_ids = zip(
+        *[
+            _boundary_quads(
+                coords, index, axis, sign, merge=mesh_mode == MeshMode.GREEDY
+            )
+            for axis in range(3)
+            for sign in (1, -1)
+        ]
+    )
+    order = np.argsort(np.concatenate(all_voxel_ids), kind="stable")
+    corners = np.concatenate(all_corners)[order]
+    quad_to_voxel = np.concatenate(all_voxel_ids)[order]
+
+    # Share vertices between quads
+    lattice_res = int(corners.max()) + 1 if len(corners) > 0 else 1
+    keys = (corners[..., 0] * lattice_res + corners[..., 1]) * lattice_res + corners[
+        ..., 2
+    ]
+    unique_keys, quads = np.unique(keys.ravel(), return_inverse=True)
+    quads = quads.reshape(-1, 4)
+    vertices = (
+        np.stack(
+            [
+                unique_keys // (lattice_res * lattice_res),
+                (unique_keys // lattice_res) % lattice_res,
+                unique_keys % lattice_res,
+            ],
+            axis=1,
+        )
+        - 0.5
+    )
+
+    # 2 triangles per quad
+    faces = np.stack([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]], axis=1).reshape(-1, 3)
+    face_to_voxel = np.repeat(quad_to_voxel, 2)
+
+    return vertices, faces, face_to_voxel
+
+
+def register_voxel_mesh(
+    vertices: np.ndarray,
+    faces: np.ndarray,
     voxel_res: int,
     bbox_min: float,
     bbox_max: float,
     name: str = "voxel_set",
     offset: Optional[np.ndarray] = None,
-) -> Tuple[ps.SurfaceMesh, np.ndarray, np.ndarray]:
-    # self.voxels = coord_bbox_filter(self.voxels, self.res)
-
-    vertex_offsets = np.repeat(coords, 8, axis=0)
-    cube_vertices = (
-        np.tile(CUBE_VERTICES_NP, (len(coords), 1)) - 0.5
-    )  # Rescale voxels (each center with point cloud)
-    vertices = cube_vertices + vertex_offsets
+) -> Tuple[ps.SurfaceMesh, np.ndarray]:
+    """
+    Normalizes `vertices` from voxel units to (bbox_min, bbox_max) and registers the mesh.
+    """
     vertices = (bbox_max - bbox_min) * (1.0 / float(voxel_res)) * vertices + bbox_min
 
     if offset is not None:
         vertices += offset
 
-    # 8 for 8 vertices
-    triangles_offsets = np.repeat(
-        np.tile((8 * np.arange(len(coords)))[:, None], ((1, 3))),
-        len(CUBE_TRIANGLES_NP),
-        axis=0,
-    )
-    faces = np.tile(CUBE_TRIANGLES_NP, (len(coords), 1)) + triangles_offsets
-
     ps_voxels = ps.register_surface_mesh(
         name,
         vertices,
@@ -68,6 +233,31 @@ def create_voxel_set_np(
     )
     ps_voxels.set_edge_width(0.0)
 
+    return ps_voxels, vertices
+
+
+def create_voxel_set_np(
+    coords: np.ndarray,
+    voxel_res: int,
+    bbox_min: float,
+    bbox_max: float,
+    name: str = "voxel_set",
+    offset: Optional[np.ndarray] = None,
+    mesh_mode: MeshMode = MeshMode.CUBES,
+) -> Tuple[ps.SurfaceMesh, np.ndarray, np.ndarray]:
+    # self.voxels = coord_bbox_filter(self.voxels, self.res)
+
+    vertices, faces, _ = mesh_voxels_np(coords, mesh_mode)
+    ps_voxels, vertices = register_voxel_mesh(
+        vertices,
+        faces,
+        voxel_res=voxel_res,
+        bbox_min=bbox_min,
+        bbox_max=bbox_max,
+        name=name,
+        offset=offset,
+    )
+
     return ps_voxels, vertices, faces
 
 
@@ -75,6 +265,18 @@ class VoxelSet:
     """
     VoxelSet provides abstraction to render a set of voxels at the given coordinates.
     Voxel positions are normalized to lie within (bbox_min, bbox_max).
+
+    Voxels live in a pool of slots (their ids) that can be edited with `add_voxels` and `remove_voxels`.
+    Removed slots are collapsed and reused. With `MeshMode.CUBES`, edits within the pool capacity
+    only update vertex positions. The capacity doubles when the pool is full.
+
+    With `compact_memory`, coordinates are packed to the smallest unsigned type fitting `voxel_res`,
+    vertices are kept as float32 and the selection mask is bit-packed. Faces are dropped once uploaded,
+    colors are stored per voxel as uint8 (expanded to faces only when uploading) and hovered elements
+    are mapped back to voxels without per-element arrays whenever possible (see `memory_usage`).
+
+    `MeshMode.GREEDY` is display only: merged rectangles span several voxels, so hovering,
+    brushing and selecting are disabled (see `interactive`).
     """
 
     def __init__(
@@ -94,9 +296,15 @@ class VoxelSet:
         selected_color: np.ndarray = DEFAULT_SELECTED_COLOR,
         hover_add_color: np.ndarray = DEFAULT_HOVER_ADD_COLOR,
         hover_remove_color: np.ndarray = DEFAULT_HOVER_REMOVE_COLOR,
+        mesh_mode: MeshMode = MeshMode.CUBES,  # Use CULLED/GREEDY for dense sets
+        compact_memory: bool = False,  # Whether to pack coordinates, masks and meshes
     ):
         # Check that the provided coordinates are valid!
         assert coords.min() >= 0 and coords.min() < voxel_res
+        if mesh_mode == MeshMode.GREEDY and selection_mask is not None:
+            raise ValueError(
+                "MeshMode.GREEDY is display only: it can't show a selection"
+            )
 
         self.name = name
         self.selection_radius = selection_radius
@@ -110,86 +318,450 @@ class VoxelSet:
         # Time stamp tracking
         self.last_selected_voxel_id = -1
         self.selection_changed = False
-
+        # Hover state drawn in the color buffer (to only recolor what changed)
+        self.hovered_ids = np.zeros(0, dtype=np.int64)
+        self.last_hover_state = None
+
+        self.compact_memory = compact_memory
+        if compact_memory:
+            # NB: coordinates equal to `voxel_res` are tolerated
+            coords = coords.astype(np.min_scalar_type(voxel_res))
+        elif not coords.flags.writeable:
+            # E.g., a read-only memmap: coordinates are edited in place
+            coords = np.array(coords)
+
+        # Slot pool (a slot is active if it holds a voxel)
         self.coords = coords
-        self.selection_mask = (
-            selection_mask
-            if selection_mask is not None
-            else np.zeros(len(coords), dtype=bool)
-        )
-
-        self.ps_voxels, self.vertices, self.faces = create_voxel_set_np(
-            coords=coords,
-            voxel_res=voxel_res,
-            bbox_min=bbox_min,
-            bbox_max=bbox_max,
-            name=name,
-            offset=offset,
+        self.active = np.ones(len(coords), dtype=bool)
+        self.free_slots = np.zeros(0, dtype=np.int64)
+        self.voxel_res = voxel_res
+        # Spatial index used by brush queries
+        self.index = VoxelIndex(coords, voxel_res)
+        self.selection_mask = self.new_mask(len(coords))
+        if selection_mask is not None:
+            self.selection_mask[:] = selection_mask
+
+        self.mesh_mode = mesh_mode
+        self.bbox_min = bbox_min
+        self.bbox_max = bbox_max
+        self.offset = offset
+        self.on_hover = self.hover_callback
+        self.enabled = True
+        self.build_mesh()
+
+    @property
+    def num_voxels(self) -> int:
+        return len(self.coords) - len(self.free_slots)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.coords)
+
+    def new_mask(self, size: int) -> Union[np.ndarray, BitMask]:
+        return BitMask(size) if self.compact_memory else np.zeros(size, dtype=bool)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Returns the number of bytes held on the Python side by each component.
+        """
+        return {
+            "coords": self.coords.nbytes,
+            "active": self.active.nbytes + self.free_slots.nbytes,
+            "selection_mask": self.selection_mask.nbytes,
+            "index": self.index.nbytes,
+            "vertices": self.vertices.nbytes,
+            "faces": 0 if self.faces is None else self.faces.nbytes,
+            "element_to_voxel": sum(
+                array.nbytes
+                for array in (
+                    self.vertex_to_voxel,
+                    self.face_to_voxel,
+                    self.voxel_face_offsets,
+                )
+                if array is not None
+            ),
+            "colors": self.colors.nbytes,
+        }
+
+    def build_mesh(self) -> None:
+        """
+        Meshes the active slots and (re-)registers the corresponding polyscope structure.
+        """
+        if self.mesh_mode == MeshMode.CUBES:
+            # One cube per slot, free slots are collapsed
+            vertices, self.faces, self.face_to_voxel = mesh_voxels_np(
+                self.coords, self.mesh_mode
+            )
+            vertices.reshape(self.capacity, 8, 3)[self.free_slots] = self.coords[
+                self.free_slots, None, :
+            ]
+        else:
+            active_ids = np.flatnonzero(self.active)
+            vertices, self.faces, face_to_voxel = mesh_voxels_np(
+                self.coords[active_ids], self.mesh_mode, index=self.index
+            )
+            self.face_to_voxel = active_ids[face_to_voxel]
+
+        if self.compact_memory:
+            vertices = vertices.astype(np.float32)
+            self.faces = self.faces.astype(np.int32)
+            self.face_to_voxel = self.face_to_voxel.astype(np.int32)
+
+        self.ps_voxels, self.vertices = register_voxel_mesh(
+            vertices,
+            self.faces,
+            voxel_res=self.voxel_res,
+            bbox_min=self.bbox_min,
+            bbox_max=self.bbox_max,
+            name=self.name,
+            offset=self.offset,
         )
+        self.ps_voxels.set_enabled(self.enabled)
+        self.num_faces = len(self.faces)
+
+        if self.compact_memory:
+            # Faces are on the GPU and elements are mapped back to voxels on hover (see `hovered_voxel_id`)
+            self.faces = None
+            self.vertex_to_voxel = None
+            self.voxel_face_offsets = None
+            if self.mesh_mode == MeshMode.CUBES:
+                # Slot `i` owns faces `[12 * i, 12 * (i + 1))`
+                self.face_to_voxel = None
+            # Persistent per-voxel colors, expanded to faces when uploading
+            self.colors = np.empty((self.capacity, 3), dtype=np.uint8)
+        else:
+            # Map mesh elements back to voxels (faces are sorted by voxel)
+            self.vertex_to_voxel = np.zeros(
+                len(self.vertices), dtype=self.face_to_voxel.dtype
+            )
+            self.vertex_to_voxel[self.faces.ravel()] = np.repeat(self.face_to_voxel, 3)
+            self.voxel_face_offsets = np.searchsorted(
+                self.face_to_voxel, np.arange(self.capacity + 1)
+            ).astype(self.face_to_voxel.dtype)
+            # Persistent per-face colors, only the dirty voxels are rewritten
+            self.colors = np.empty((self.num_faces, 3), dtype=np.float32)
+        self.colors[:] = self.stored_color(self.base_color)
 
         self.ps_voxels.add_color_quantity(
-            name + "selection",
-            np.tile(self.base_color[None, :], (len(self.faces), 1)),
+            self.name + "selection",
+            self.face_colors(),
             defined_on="faces",
             enabled=True,
         )
 
         self.selection_buffer = self.ps_voxels.get_quantity_buffer(
-            name + "selection", "colors"
+            self.name + "selection", "colors"
         )
 
         self.update_selection_buffer()
 
-        self.ps_voxels.set_hover_callback(self.hover_callback)
+        self.ps_voxels.set_hover_callback(self.on_hover)
+
+    def set_hover_callback(self, callback) -> None:
+        """
+        Overrides the hover callback (kept when the mesh is re-registered).
+        """
+        self.on_hover = callback
+        self.ps_voxels.set_hover_callback(callback)
+
+    # ===============
+    # EDITING
+    # ===============
+
+    def slot_vertices(self, slot_ids: np.ndarray) -> np.ndarray:
+        """
+        Returns the vertices (in vertex pool order) of cubes at the slots `slot_ids` (CUBES mode only).
+        """
+        vertices, _, _ = mesh_voxels_np(self.coords[slot_ids], MeshMode.CUBES)
+        vertices = (self.bbox_max - self.bbox_min) * (
+            1.0 / float(self.voxel_res)
+        ) * vertices + self.bbox_min
+        if self.offset is not None:
+            vertices += self.offset
+        return vertices
+
+    def collapse_slots(self, slot_ids: np.ndarray) -> None:
+        """
+        Collapses the cubes of `slot_ids` to their center so that their triangles are degenerate (CUBES mode only).
+        """
+        vertices = self.vertices.reshape(self.capacity, 8, 3)
+        vertices[slot_ids] = vertices[slot_ids].mean(1, keepdims=True)
+
+    def grow(self, min_capacity: int) -> None:
+        """
+        Doubles the capacity of the slot pool (at least up to `min_capacity`).
+        """
+        capacity = max(2 * self.capacity, min_capacity)
+        num_new = capacity - self.capacity
+        self.free_slots = np.concatenate(
+            [np.arange(capacity - 1, self.capacity - 1, -1), self.free_slots]
+        )
+        self.coords = np.concatenate(
+            [self.coords, np.zeros((num_new, 3), dtype=self.coords.dtype)]
+        )
+        self.active = np.concatenate([self.active, np.zeros(num_new, dtype=bool)])
+        selection_mask = self.new_mask(capacity)
+        selection_mask[: len(self.selection_mask)] = self.selection_mask[:]
+        self.selection_mask = selection_mask
+        self.index.coords = self.coords
+
+    def compact(self) -> np.ndarray:
+        """
+        Removes free slots from the pool and re-registers the mesh.
+        Returns the map from old to new voxel ids (-1 for free slots).
+        """
+        active_ids = np.flatnonzero(self.active)
+        old_to_new = np.full(self.capacity, -1, dtype=np.int64)
+        old_to_new[active_ids] = np.arange(len(active_ids))
+
+        self.coords = self.coords[active_ids]
+        self.active = self.active[active_ids]
+        selection_mask = self.new_mask(len(active_ids))
+        selection_mask[:] = self.selection_mask[active_ids]
+        self.selection_mask = selection_mask
+        self.free_slots = np.zeros(0, dtype=np.int64)
+        self.index = VoxelIndex(self.coords, self.voxel_res)
+        self.hovered_ids = np.zeros(0, dtype=np.int64)
+        self.last_selected_voxel_id = -1
+        self.build_mesh()
+
+        return old_to_new
+
+    def add_voxels(self, coords: np.ndarray) -> np.ndarray:
+        """
+        Adds voxels at `coords` (voxels already in the set are left untouched).
+        Returns the ids of the voxels at `coords`.
+        """
+        assert coords.min() >= 0 and coords.max() < self.voxel_res
+
+        ids = self.index.lookup(coords)
+        new_coords, inverse = np.unique(coords[ids < 0], axis=0, return_inverse=True)
+        if len(new_coords) == 0:
+            return ids
+
+        # Reuse free slots first, grow the pool if needed
+        rebuild = self.mesh_mode != MeshMode.CUBES
+        if len(new_coords) > len(self.free_slots):
+            self.grow(self.num_voxels + len(new_coords))
+            rebuild = True
+        slot_ids = self.free_slots[-len(new_coords) :][::-1]
+        self.free_slots = self.free_slots[: -len(new_coords)]
+
+        self.coords[slot_ids] = new_coords
+        self.active[slot_ids] = True
+        self.selection_mask[slot_ids] = False
+        self.index.insert(new_coords, slot_ids)
+        ids[ids < 0] = slot_ids[inverse.ravel()]
+
+        if rebuild:
+            self.build_mesh()
+        else:
+            self.vertices.reshape(self.capacity, 8, 3)[slot_ids] = self.slot_vertices(
+                slot_ids
+            ).reshape(-1, 8, 3)
+            self.ps_voxels.update_vertex_positions(self.vertices)
+            self.update_selection_buffer(self.hovered_ids, slot_ids)
+
+        return ids
+
+    def remove_voxels(self, ids: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Removes the voxels `ids`. Their slots are collapsed and reused by later additions.
+        If the pool gets compacted, returns the map from old to new voxel ids (-1 for removed voxels).
+        """
+        ids = np.unique(ids)
+        ids = ids[self.active[ids]]
+        if len(ids) == 0:
+            return None
+
+        self.index.remove(self.coords[ids])
+        self.active[ids] = False
+        self.selection_mask[ids] = False
+        self.free_slots = np.concatenate([self.free_slots, ids])
+
+        if len(self.free_slots) > COMPACTION_RATIO * self.capacity:
+            return self.compact()
+
+        if self.mesh_mode == MeshMode.CUBES:
+            self.collapse_slots(ids)
+            self.ps_voxels.update_vertex_positions(self.vertices)
+        else:
+            self.build_mesh()
 
-    def update_selection_buffer(self, within_radius: Optional[np.ndarray] = None):
-        current_selection = np.tile(self.base_color[None, :], (len(self.coords), 1))
-        current_selection[self.selection_mask] = self.selected_color
+        return None
 
-        if within_radius is not None:
-            current_selection[within_radius] = (
-                self.hover_add_color
-                if self.brush_mode == BrushMode.ADD
-                else self.hover_remove_color
-            )
+    def voxel_face_ids(self, voxel_ids: np.ndarray) -> np.ndarray:
+        """
+        Returns the ids of the faces of the voxels `voxel_ids`.
+        """
+        return concatenate_ranges(
+            self.voxel_face_offsets[voxel_ids],
+            self.voxel_face_offsets[voxel_ids + 1],
+        )
 
-        current_selection = np.repeat(current_selection, 12, axis=0)
+    def update_selection_buffer(
+        self,
+        within_radius: Optional[np.ndarray] = None,
+        changed_ids: Optional[np.ndarray] = None,
+    ):
+        """
+        Recolors the voxels that changed since the last update and uploads the color buffer.
+        `within_radius` are the ids of the hovered voxels and `changed_ids` the ids of voxels whose selection changed.
+        Previously hovered voxels are always recolored. If `changed_ids` is None, all voxels are recolored.
+
+        NB: polyscope only uploads whole buffers (`update_data_from_host`), so every call still uploads
+        all the face colors: tracking dirty voxels only saves the recoloring on the CPU side,
+        the upload remains O(faces) (see the hover timings of `examples/voxel_mesh_benchmark.py`).
+        """
+        hovered_ids = (
+            within_radius if within_radius is not None else np.zeros(0, dtype=np.int64)
+        )
 
-        self.selection_buffer.update_data_from_host(current_selection)
+        if changed_ids is None:
+            dirty_ids = slice(None)
+        else:
+            dirty_ids = np.unique(
+                np.concatenate([self.hovered_ids, hovered_ids, changed_ids])
+            )
+            if len(dirty_ids) == 0:
+                return
+            if len(dirty_ids) > FULL_UPDATE_RATIO * len(self.coords):
+                dirty_ids = slice(None)
+
+        if changed_ids is None or within_radius is None:
+            # The drawn hover state is lost
+            self.last_hover_state = None
+        self.hovered_ids = hovered_ids
+
+        if self.compact_memory:
+            element_ids, hovered_element_ids = dirty_ids, hovered_ids
+            voxel_ids = dirty_ids
+        else:
+            element_ids = (
+                dirty_ids
+                if isinstance(dirty_ids, slice)
+                else self.voxel_face_ids(dirty_ids)
+            )
+            hovered_element_ids = self.voxel_face_ids(hovered_ids)
+            voxel_ids = self.face_to_voxel[element_ids]
+        self.colors[element_ids] = np.where(
+            self.selection_mask[voxel_ids][:, None],
+            self.stored_color(self.selected_color),
+            self.stored_color(self.base_color),
+        )
+        self.colors[hovered_element_ids] = self.stored_color(
+            self.hover_add_color
+            if self.brush_mode == BrushMode.ADD
+            else self.hover_remove_color
+        )
 
-    def hover_callback(self, mesh_element: ps.MeshElement, index: int):
+        self.selection_buffer.update_data_from_host(self.face_colors())
+
+    def stored_color(self, color: np.ndarray) -> np.ndarray:
+        """
+        Returns `color` (RGB in [0, 1]) in the dtype of `colors`.
+        """
+        if self.compact_memory:
+            return np.round(255.0 * np.asarray(color)).astype(np.uint8)
+        return color
+
+    def face_colors(self) -> np.ndarray:
+        """
+        Returns the (F, 3) float32 face colors uploaded to polyscope.
+        """
+        if not self.compact_memory:
+            return self.colors
+        if self.face_to_voxel is None:
+            face_colors = np.repeat(self.colors, len(CUBE_TRIANGLES_NP), axis=0)
+        else:
+            face_colors = self.colors[self.face_to_voxel]
+        return face_colors.astype(np.float32) * np.float32(1.0 / 255.0)
+
+    def hovered_voxel_id(
+        self, mesh_element: ps.MeshElement, index: int
+    ) -> Optional[int]:
+        """
+        Returns the id of the voxel owning the hovered mesh element (if any).
+        """
+        if not self.interactive:
+            return None
         if mesh_element == ps.MeshElement.VERTEX.value:
-            voxel_id = index // 8
+            if self.vertex_to_voxel is not None:
+                return self.vertex_to_voxel[index]
+            return self.vertex_voxel_id(index)
         elif mesh_element == ps.MeshElement.FACE.value:
-            voxel_id = index // 12
-        else:
-            return
-
-        hovered_voxel = self.coords[voxel_id]
-
+            if self.face_to_voxel is not None:
+                return self.face_to_voxel[index]
+            return index // len(CUBE_TRIANGLES_NP)
+        return None
+
+    def vertex_voxel_id(self, index: int) -> Optional[int]:
+        """
+        Returns the id of an active voxel having the vertex `index` as corner (without `vertex_to_voxel`).
+        """
+        if self.mesh_mode == MeshMode.CUBES:
+            voxel_id = index // len(CUBE_VERTICES_NP)
+            return voxel_id if self.active[voxel_id] else None
+
+        # Back to voxel units: the vertex is the corner shared by (up to) 8 voxels
+        vertex = self.vertices[index].astype(np.float64)
+        if self.offset is not None:
+            vertex = vertex - self.offset
+        corner = np.round(
+            (vertex - self.bbox_min)
+            * (self.voxel_res / (self.bbox_max - self.bbox_min))
+            + 0.5
+        ).astype(np.int64)
+        ids = self.index.lookup(corner[None, :] - CUBE_VERTICES_NP.astype(np.int64))
+        ids = ids[ids >= 0]
+        return int(ids[0]) if len(ids) > 0 else None
+
+    def brush_ids(self, center: np.ndarray) -> np.ndarray:
+        """
+        Returns the ids of the voxels within the brush centered at `center` (in voxel coordinates).
+        """
         if self.square_brush:
-            within_radius = (np.abs(hovered_voxel[None, :] - self.coords)).max(
-                1
-            ) < self.selection_radius
-        else:
-            within_radius = ((hovered_voxel[None, :] - self.coords) ** 2).sum(
-                1
-            ) < self.selection_radius**2
+            return self.index.query_square(center, self.selection_radius)
+        return self.index.query_sphere(center, self.selection_radius)
 
-        if (
+    def hover_callback(self, mesh_element: ps.MeshElement, index: int):
+        voxel_id = self.hovered_voxel_id(mesh_element, index)
+        if voxel_id is None:
+            return
+
+        clicked = (
             psim.IsMouseClicked(0)
             and psim.GetIO().KeyAlt
             and voxel_id != self.last_selected_voxel_id
-        ):
-            if self.brush_mode == BrushMode.REMOVE:
-                self.selection_mask &= ~within_radius
-            else:
-                self.selection_mask |= within_radius
+        )
+
+        # Nothing to recolor if the brush didn't move
+        hover_state = (
+            voxel_id,
+            self.selection_radius,
+            self.square_brush,
+            self.brush_mode,
+        )
+        if not clicked and hover_state == self.last_hover_state:
+            return
+
+        # Ids of the voxels within the brush
+        within_radius = self.brush_ids(self.coords[voxel_id])
+
+        changed_ids = np.zeros(0, dtype=np.int64)
+        if clicked:
+            self.selection_mask[within_radius] = self.brush_mode == BrushMode.ADD
+            changed_ids = within_radius
 
             self.last_selected_voxel_id = voxel_id
             self.selection_changed = True
 
-        self.update_selection_buffer(within_radius)
+        self.update_selection_buffer(within_radius, changed_ids)
+        self.last_hover_state = hover_state
+
+    @property
+    def interactive(self) -> bool:
+        return self.mesh_mode != MeshMode.GREEDY
 
     def gui(self) -> bool:
         update = False
@@ -206,33 +778,43 @@ class VoxelSet:
             min(self.selection_radius, MAX_SELECTION_RADIUS),
         )
 
-        if psim.Button(f"Reset##voxel_set_{self.name}"):
-            self.selection_mask = np.zeros_like(self.selection_mask)
-            self.update_selection_buffer()
-            update |= True
-
-        psim.SameLine()
-        if psim.Button(f"Invert##voxel_set_{self.name}"):
-            self.selection_mask = ~self.selection_mask
-            self.update_selection_buffer()
-            update |= True
-
-        # Switch selection
-        if KEY_HANDLER("s"):
-            self.brush_mode = BRUSH_MODE_INVMAP[1 - BRUSH_MODE_MAP[self.brush_mode]]
+        if self.interactive:
+            if psim.Button(f"Reset##voxel_set_{self.name}"):
+                self.selection_mask[:] = False
+                self.update_selection_buffer()
+                update |= True
+
+            psim.SameLine()
+            if psim.Button(f"Invert##voxel_set_{self.name}"):
+                self.selection_mask[:] = ~self.selection_mask[:] & self.active
+                self.update_selection_buffer()
+                update |= True
+
+            # Switch selection
+            if KEY_HANDLER("s"):
+                self.brush_mode = BRUSH_MODE_INVMAP[1 - BRUSH_MODE_MAP[self.brush_mode]]
+
+            _, self.brush_mode = choice_slider(
+                "Brush Mode##voxel_set_{self.name}",
+                self.brush_mode,
+                BRUSH_MODE_MAP,
+                BRUSH_MODE_INVMAP,
+            )
 
-        _, self.brush_mode = choice_slider(
-            "Brush Mode##voxel_set_{self.name}",
-            self.brush_mode,
-            BRUSH_MODE_MAP,
-            BRUSH_MODE_INVMAP,
-        )
+            _, self.square_brush = psim.Checkbox(
+                f"Square##voxel_set_{self.name}", self.square_brush
+            )
+            psim.SameLine()
+            psim.Text(f"Radius: {self.selection_radius}")
+        else:
+            psim.Text("Greedy mesh: display only (no selection)")
 
-        _, self.square_brush = psim.Checkbox(
-            f"Square##voxel_set_{self.name}", self.square_brush
-        )
-        psim.SameLine()
-        psim.Text(f"Radius: {self.selection_radius}")
+        if psim.TreeNode(f"Memory##voxel_set_{self.name}"):
+            memory_usage = self.memory_usage()
+            for k, v in memory_usage.items():
+                psim.Text(f"{k}: {v / 2**20:.2f} MB")
+            psim.Text(f"total: {sum(memory_usage.values()) / 2**20:.2f} MB")
+            psim.TreePop()
 
         # Notify parent if something changed
         update |= self.selection_changed
@@ -240,4 +822,5 @@ class VoxelSet:
         return update
 
     def set_enabled(self, val: bool = True):
+        self.enabled = val
         self.ps_voxels.set_enabled(val)
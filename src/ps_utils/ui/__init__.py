@@ -5,3 +5,5 @@ from ps_utils.ui.key_handler import *
 from ps_utils.ui.map_utils import *
 from ps_utils.ui.save_utils import *
 from ps_utils.ui.sliders import *
+from ps_utils.ui.thumbnail_cache import *
+from ps_utils.ui.gallery import *
@@ -0,0 +1,176 @@
+from typing import Callable, Dict, List, Optional, Set
+import math
+import os
+
+import polyscope.imgui as psim
+
+from ps_utils.ui.save_utils import BASIC_IMAGE_EXTENSIONS
+from ps_utils.ui.thumbnail_cache import ThumbnailCache
+
+DEFAULT_TILE_SIZE = 128
+DEFAULT_GALLERY_HEIGHT = 400
+DEFAULT_PREFETCH_ROWS = 2
+TILE_PADDING = 4
+
+
+def list_images(
+    folder: str, extensions: Set[str] = BASIC_IMAGE_EXTENSIONS
+) -> List[str]:
+    """
+    Lists the images of a folder (sorted by name) without opening them.
+    """
+    return sorted(
+        entry.path
+        for entry in os.scandir(folder)
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions
+    )
+
+
+class ImageGallery:
+    """
+    Scrollable grid of images, e.g., the content of a dropped folder.
+    Rendering is virtualized: only the visible tiles (plus `prefetch_rows` rows above and below,
+    decoded in the background) are requested from a `ThumbnailCache` whose memory budget follows
+    the number of visible tiles, so that everything else is evicted.
+    Modification times are read once per image (when its tile is first requested), not every frame.
+    Call `gui()` from your gui; `on_select(path)` is called when a tile is clicked.
+    """
+
+    def __init__(
+        self,
+        name: str = "gallery",
+        tile_size: int = DEFAULT_TILE_SIZE,
+        height: int = DEFAULT_GALLERY_HEIGHT,
+        prefetch_rows: int = DEFAULT_PREFETCH_ROWS,
+        on_select: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.name = name
+        self.tile_size = tile_size
+        self.height = height
+        self.prefetch_rows = prefetch_rows
+        self.on_select = on_select
+
+        self.paths: List[str] = []
+        self.mtimes: Dict[str, int] = {}
+        self.invalid_paths: Set[str] = set()
+        self.selected = None
+        self.cache = ThumbnailCache(
+            name=f"{name}_tiles",
+            max_preview_h=tile_size,
+            max_preview_w=tile_size,
+        )
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def set_paths(self, paths: List[str]) -> None:
+        self.paths = list(paths)
+        self.mtimes = {}
+        self.invalid_paths.clear()
+        self.selected = None
+        self.cache.clear()
+
+    def set_folder(self, folder: str) -> None:
+        self.set_paths(list_images(folder))
+
+    # ===============
+    # TILES
+    # ===============
+
+    @property
+    def cell_size(self) -> int:
+        return self.tile_size + TILE_PADDING
+
+    def get_thumbnail(self, path: str):
+        if path in self.invalid_paths:
+            return None
+        try:
+            if path not in self.mtimes:
+                self.mtimes[path] = os.stat(path).st_mtime_ns
+            return self.cache.get(path, self.mtimes[path])
+        except Exception as e:
+            print(f"Couldn't load image at: {path}")
+            self.invalid_paths.add(path)
+            return None
+
+    def update_budget(self, num_columns: int, num_rows: int) -> None:
+        # Keep the visible and prefetched rows resident, evict the others
+        self.cache.max_bytes = (
+            (num_rows + 2 * self.prefetch_rows)
+            * num_columns
+            * ThumbnailCache.preview_nbytes((self.tile_size, self.tile_size))
+        )
+
+    def prefetch(self, first: int, last: int) -> None:
+        for path in self.paths[max(first, 0) : max(last, 0)]:
+            self.get_thumbnail(path)
+
+    # ===============
+    # GUI
+    # ===============
+
+    def tile_gui(self, index: int, x: float, y: float) -> None:
+        path = self.paths[index]
+        thumbnail = self.get_thumbnail(path)
+
+        # Center the preview in its tile
+        h, w = (
+            thumbnail.preview_size
+            if thumbnail is not None
+            else (self.tile_size, self.tile_size)
+        )
+        psim.SetCursorPos(
+            (x + (self.tile_size - w) // 2, y + (self.tile_size - h) // 2)
+        )
+        if thumbnail is not None:
+            thumbnail.gui()
+        else:
+            psim.Button(f"?##{self.name}_{index}", (w, h))
+
+        if psim.IsItemHovered():
+            psim.SetTooltip(os.path.basename(path))
+        if psim.IsItemClicked():
+            self.selected = index
+            if self.on_select is not None:
+                self.on_select(path)
+
+    def gui(self) -> None:
+        if len(self.paths) == 0:
+            return
+
+        psim.Text(f"{len(self.paths)} images ({len(self.cache)} resident)")
+
+        psim.BeginChild(f"##{self.name}", (0, self.height), True)
+
+        cell_size = self.cell_size
+        num_columns = max(1, int(psim.GetContentRegionAvail()[0] // cell_size))
+        num_rows = math.ceil(len(self.paths) / num_columns)
+        num_visible_rows = math.ceil(self.height / cell_size) + 1
+        first_row = int(psim.GetScrollY() // cell_size)
+        last_row = min(first_row + num_visible_rows, num_rows)
+
+        self.update_budget(num_columns, num_visible_rows)
+
+        # Only submit the visible tiles
+        for row in range(first_row, last_row):
+            for col in range(num_columns):
+                index = row * num_columns + col
+                if index >= len(self.paths):
+                    break
+                self.tile_gui(index, col * cell_size, row * cell_size)
+
+        # Extend the content to the full grid so that the scrollbar covers all rows
+        psim.SetCursorPos((0, num_rows * cell_size))
+        psim.Dummy((1, 1))
+
+        psim.EndChild()
+
+        # Decode the rows below and above in the background
+        self.prefetch(
+            last_row * num_columns,
+            (last_row + self.prefetch_rows) * num_columns,
+        )
+        self.prefetch(
+            (first_row - self.prefetch_rows) * num_columns,
+            first_row * num_columns,
+        )
@@ -1,26 +1,150 @@
 from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Tuple
+from typing import Any, Callable, Optional, Tuple
 from PIL import Image
 
 import numpy as np
 import polyscope as ps
+import polyscope.imgui as psim
 
 DEFAULT_MAX_PREVIEW_SIZE = 250
+DEFAULT_NUM_DECODE_WORKERS = 4
+
+# Shared pool decoding previews in the background (created on first use)
+DECODE_POOL: Optional[ThreadPoolExecutor] = None
+
+
+def get_decode_pool() -> ThreadPoolExecutor:
+    global DECODE_POOL
+    if DECODE_POOL is None:
+        DECODE_POOL = ThreadPoolExecutor(max_workers=DEFAULT_NUM_DECODE_WORKERS)
+    return DECODE_POOL
+
+
+def get_preview_size(
+    h: int,
+    w: int,
+    max_preview_h: int = DEFAULT_MAX_PREVIEW_SIZE,
+    max_preview_w: int = DEFAULT_MAX_PREVIEW_SIZE,
+) -> Tuple[int, int]:
+    """
+    Returns the largest (h, w) fitting in (max_preview_h, max_preview_w) with the aspect ratio of the image.
+    """
+    aspect_ratio = float(h) / float(w)
+    clipped_h, clipped_w = min(h, max_preview_h), min(w, max_preview_w)
+    return (
+        max(1, int(min(clipped_h, clipped_w * aspect_ratio))),
+        max(1, int(min(clipped_w, clipped_h / aspect_ratio))),
+    )
+
+
+def make_preview(image: Image.Image, preview_size: Tuple[int, int]) -> np.ndarray:
+    """
+    Resizes `image` to `preview_size` and returns it as float32 RGBA.
+    """
+    h, w = preview_size
+    # `reduce` doesn't support every mode (e.g., palette, 1-bit or 16-bit images)
+    if image.mode not in ("L", "LA", "RGB", "RGBA"):
+        image = image.convert("RGBA")
+    # Cheap integer box reduction before the final resampling
+    factor = min(image.width // w, image.height // h)
+    if factor > 1:
+        image = image.reduce(factor)
+    image = image.convert("RGBA")
+    if image.size != (w, h):
+        image = image.resize((w, h), Image.BILINEAR)
+    return np.asarray(image, dtype=np.float32) / 255.0
+
+
+def load_preview(
+    input_path: str,
+    preview_size: Optional[Tuple[int, int]] = None,
+    max_preview_h: int = DEFAULT_MAX_PREVIEW_SIZE,
+    max_preview_w: int = DEFAULT_MAX_PREVIEW_SIZE,
+) -> np.ndarray:
+    """
+    Decodes `input_path` directly at (about) `preview_size`, by default the largest size
+    fitting in (max_preview_h, max_preview_w) (see `get_preview_size`, the header is read here).
+    NB: JPEGs are decoded at 1/2, 1/4 or 1/8 of their resolution with PIL's draft mode.
+    """
+    with Image.open(input_path) as image:
+        if preview_size is None:
+            preview_size = get_preview_size(
+                image.height, image.width, max_preview_h, max_preview_w
+            )
+        image.draft("RGB", (preview_size[1], preview_size[0]))
+        return make_preview(image, preview_size)
 
 
 @dataclass
 class Thumbnail:
+    """
+    Image preview displayed with `gui()`.
+    When created with `from_path`, the file is only opened in the background, where the preview
+    is decoded at its final size: until then, `preview_size` is the maximum size, `preview_quantity`
+    is None and a placeholder is displayed. Once decoded, `poll()` registers the quantity
+    (or lets `on_decoded` provide one, see `ThumbnailCache`) and uploads the preview.
+    The full-resolution `image` is then None until `load_full()`.
+    """
 
-    image: Image.Image
-    image_preview: np.ndarray
+    image: Optional[Image.Image]  # None until `load_full()` for thumbnails of a path
+    image_preview: Optional[np.ndarray]  # None while decoding
     preview_quantity: Any
     preview_size: Tuple[int, int]
+    name: str = "thumbnail"
+    path: Optional[str] = None
+    future: Optional[Future] = None
+    on_decoded: Optional[Callable[[Thumbnail], None]] = None
+
+    @property
+    def quantity_name(self) -> str:
+        return f"{self.name}_buffer"
+
+    @property
+    def ready(self) -> bool:
+        return self.image_preview is not None
+
+    def poll(self) -> bool:
+        """
+        Uploads the preview once decoded. Returns whether it is ready.
+        """
+        if self.future is not None and self.future.done():
+            future, self.future = self.future, None
+            try:
+                self.image_preview = future.result()
+                if self.preview_quantity is None:
+                    self.preview_size = self.image_preview.shape[:2]
+                    if self.on_decoded is not None:
+                        self.on_decoded(self)
+                    else:
+                        self.preview_quantity = ps.add_color_alpha_image_quantity(
+                            self.quantity_name, self.image_preview
+                        )
+                ps.get_quantity_buffer(
+                    self.quantity_name, "colors"
+                ).update_data_from_host(self.image_preview.reshape(-1, 4))
+            except Exception as e:
+                print(f"Couldn't load image at: {self.path}")
+        return self.ready
 
     def gui(self):
+        self.poll()
+        if self.preview_quantity is None:
+            # Still decoding: keep its room in the layout
+            psim.Button(
+                f"##thumbnail_{id(self)}", (self.preview_size[1], self.preview_size[0])
+            )
+            return
         # Simply display the corresponding quantity at the requested size
         self.preview_quantity.imgui_image(self.preview_size[1], self.preview_size[0])
 
+    def load_full(self) -> Image.Image:
+        if self.image is None:
+            self.image = Image.open(self.path)
+            self.image.load()
+        return self.image
+
     @staticmethod
     def from_PIL(
         image: Image.Image,
@@ -31,40 +155,21 @@ class Thumbnail:
         # ==========
         # PROCESS
         # ==========
-        image_preview = np.array(image).astype(np.float32) / 255.0
-        if image_preview.shape[2] == 3:
-            image_preview = np.concatenate(
-                [
-                    image_preview,
-                    np.ones(
-                        (
-                            image_preview.shape[0],
-                            image_preview.shape[1],
-                            1,
-                        ),
-                        dtype=np.float32,
-                    ),
-                ],
-                axis=-1,
-            )
+        preview_size = get_preview_size(
+            image.height, image.width, max_preview_h, max_preview_w
+        )
+        image_preview = make_preview(image, preview_size)
         preview_quantity = ps.add_color_alpha_image_quantity(
             f"{name}_buffer",
             image_preview,
         )
-        h, w = image_preview.shape[:2]
-        aspect_ratio = float(h) / float(w)
-
-        clipped_h, clipped_w = min(h, max_preview_h), min(w, max_preview_w)
-        preview_size = (
-            int(min(clipped_h, clipped_w * aspect_ratio)),
-            int(min(clipped_w, clipped_h / aspect_ratio)),
-        )
 
         return Thumbnail(
             image=image,
             image_preview=image_preview,
             preview_quantity=preview_quantity,
             preview_size=preview_size,
+            name=name,
         )
 
     @staticmethod
@@ -73,14 +178,41 @@ class Thumbnail:
         name: str = "thumbnail",
         max_preview_h: int = DEFAULT_MAX_PREVIEW_SIZE,
         max_preview_w: int = DEFAULT_MAX_PREVIEW_SIZE,
+        async_load: bool = True,
     ) -> Thumbnail:
         # ==========
         # LOAD
         # ==========
-        image = Image.open(input_path)
+        if not async_load:
+            image_preview = load_preview(
+                input_path, max_preview_h=max_preview_h, max_preview_w=max_preview_w
+            )
+            preview_quantity = ps.add_color_alpha_image_quantity(
+                f"{name}_buffer", image_preview
+            )
+            return Thumbnail(
+                image=None,
+                image_preview=image_preview,
+                preview_quantity=preview_quantity,
+                preview_size=image_preview.shape[:2],
+                name=name,
+                path=input_path,
+            )
 
-        return Thumbnail.from_PIL(
-            image, name=name, max_preview_h=max_preview_h, max_preview_w=max_preview_w
+        # The quantity is registered once the preview is decoded (see `poll`)
+        return Thumbnail(
+            image=None,
+            image_preview=None,
+            preview_quantity=None,
+            preview_size=(max_preview_h, max_preview_w),
+            name=name,
+            path=input_path,
+            future=get_decode_pool().submit(
+                load_preview,
+                input_path,
+                max_preview_h=max_preview_h,
+                max_preview_w=max_preview_w,
+            ),
         )
 
 
@@ -1,42 +1,117 @@
 import os
-import glob
 import ast
-from functools import partial
-from typing import Callable, Set, Optional
+import atexit
+import re
+import threading
+from queue import Queue
+from typing import Any, Callable, Dict, List, Set, Optional
 
+import numpy as np
 import polyscope.imgui as psim
 
+from ps_utils.io.write_utils import write_atomic
+from ps_utils.ui.alert_handler import AlertHandler
 from ps_utils.ui.key_handler import KEY_HANDLER, KEYMAP
 
 
-def get_next_save_factory(
-    default_folder: str, extension: Optional[str], prefix: str = "exported"
-) -> Callable[[], str]:
+class NextSavePath:
     """
-    Create a function that crawls a folder for `{prefix}_{:06d}.{extension}` and returns the next valid path.
-    NB: Use `extension` = None for folders.
+    Allocates `{prefix}_{:06d}.{extension}` paths in a folder (folders if `extension` is None).
+    The folder is scanned once for the largest index (gaps in numbering are fine).
+    Calling it returns the next free path without writing anything (e.g., for `save_popup`),
+    but that path isn't claimed: it is only safe with a single writer.
+    `reserve` claims paths by exclusively creating the targets (an empty file or a folder) and the folder,
+    so that concurrent writers (threads or other viewers sharing the folder) never get the same path
+    (see `SaveQueue.save_next`).
+    NB: a reserved file stays empty if nothing is written to it.
     """
 
-    def aux(default_folder: str, extension: str, prefix: str = "exported"):
-        os.makedirs(default_folder, exist_ok=True)
-        all_exported_paths = glob.glob(
-            os.path.join(
-                default_folder,
-                f"{prefix}_*.{extension}" if extension is not None else f"{prefix}_*",
-            )
-        )
+    def __init__(
+        self, default_folder: str, extension: Optional[str], prefix: str = "exported"
+    ) -> None:
+        self.default_folder = default_folder
+        self.extension = extension
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.next_index = None
+        suffix = re.escape(f".{extension}") if extension is not None else ""
+        self.pattern = re.compile(rf"{re.escape(prefix)}_(\d+){suffix}")
+
+    def path(self, index: int) -> str:
         return os.path.join(
-            default_folder,
+            self.default_folder,
             (
-                f"{prefix}_{len(all_exported_paths):06d}.{extension}"
-                if extension is not None
-                else f"{prefix}_{len(all_exported_paths):06d}"
+                f"{self.prefix}_{index:06d}.{self.extension}"
+                if self.extension is not None
+                else f"{self.prefix}_{index:06d}"
             ),
         )
 
-    return partial(
-        aux, default_folder=default_folder, extension=extension, prefix=prefix
-    )
+    def scan(self) -> int:
+        if not os.path.isdir(self.default_folder):
+            return 0
+        indices = [
+            int(match.group(1))
+            for match in map(self.pattern.fullmatch, os.listdir(self.default_folder))
+            if match is not None
+        ]
+        return max(indices, default=-1) + 1
+
+    def try_reserve(self, path: str) -> bool:
+        try:
+            if self.extension is None:
+                os.mkdir(path)
+            else:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+        except FileExistsError:
+            return False
+        return True
+
+    def ensure_scanned(self) -> None:
+        if self.next_index is None:
+            self.next_index = self.scan()
+
+    def reserve(self, count: int) -> List[str]:
+        """
+        Reserves `count` consecutive-when-possible paths (e.g., for burst exports).
+        """
+        with self.lock:
+            os.makedirs(self.default_folder, exist_ok=True)
+            self.ensure_scanned()
+            paths = []
+            while len(paths) < count:
+                path = self.path(self.next_index)
+                if self.try_reserve(path):
+                    paths.append(path)
+                    self.next_index += 1
+                else:
+                    # Another writer got there first: catch up with the folder
+                    self.next_index = max(self.next_index + 1, self.scan())
+            return paths
+
+    def __call__(self) -> str:
+        """
+        Returns the next free path. Nothing is created, so concurrent writers may get the same path:
+        use `reserve` to claim it.
+        """
+        with self.lock:
+            self.ensure_scanned()
+            while os.path.exists(self.path(self.next_index)):
+                # Written since the last call: catch up with the folder
+                self.next_index = max(self.next_index + 1, self.scan())
+            return self.path(self.next_index)
+
+
+def get_next_save_factory(
+    default_folder: str, extension: Optional[str], prefix: str = "exported"
+) -> Callable[[], str]:
+    """
+    Create a function that returns the next valid `{prefix}_{:06d}.{extension}` path in a folder (see `NextSavePath`).
+    Calling it only reads the folder and is meant for a single writer; concurrent writers should
+    claim paths with its `reserve(count)`, which creates them on disk (see `SaveQueue.save_next`).
+    NB: Use `extension` = None for folders.
+    """
+    return NextSavePath(default_folder, extension, prefix)
 
 
 def parse_int_list(s: str) -> list[int]:
@@ -66,3 +141,98 @@ BASIC_MESH_EXTENSIONS = {".ply", ".obj", ".stl"}
 def check_extension(input_path: str, extensions: Set[str] = BASIC_IMAGE_EXTENSIONS):
     extension = os.path.splitext(input_path)[1]
     return extension in extensions
+
+
+# ===============
+# ASYNC SAVES
+# ===============
+
+
+class SaveQueue:
+    """
+    Saves payloads (see `write_atomic`) on a background thread so that `gui()` never blocks on disk.
+    Repeated saves to a path that is still pending are collapsed: only the latest payload is written.
+    Numpy arrays are copied when queued; callables should capture their own snapshot.
+    Call `gui()` every frame to display progress and forward results to `alert_handler`.
+    Pending saves are flushed at exit (e.g., when the window is closed).
+    """
+
+    def __init__(
+        self,
+        alert_handler: Optional[AlertHandler] = None,
+        alert_on_success: bool = True,
+    ) -> None:
+        self.alert_handler = alert_handler
+        self.alert_on_success = alert_on_success
+
+        self.lock = threading.Lock()
+        self.pending: Dict[str, Any] = {}
+        self.paths: Queue = Queue()
+        self.current_path = None
+        self.messages: List[str] = []
+        self.num_collapsed = 0
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        # The worker is a daemon thread: write pending saves before the interpreter exits
+        atexit.register(self.flush)
+
+    def save(self, path: str, payload: Any) -> None:
+        if isinstance(payload, np.ndarray):
+            payload = payload.copy()
+        with self.lock:
+            collapsed = path in self.pending
+            self.pending[path] = payload
+            self.num_collapsed += collapsed
+        if not collapsed:
+            self.paths.put(path)
+
+    def save_next(self, next_path: NextSavePath, payload: Any) -> str:
+        """
+        Reserves the next path of `next_path` (so that concurrent writers never share it)
+        and saves `payload` there. Returns the path.
+        """
+        path = next_path.reserve(1)[0]
+        self.save(path, payload)
+        return path
+
+    @property
+    def num_pending(self) -> int:
+        with self.lock:
+            return len(self.pending) + (self.current_path is not None)
+
+    def flush(self) -> None:
+        """
+        Waits for all pending saves to be written.
+        """
+        self.paths.join()
+
+    def run(self) -> None:
+        while True:
+            path = self.paths.get()
+            with self.lock:
+                payload = self.pending.pop(path)
+                self.current_path = path
+
+            try:
+                write_atomic(path, payload)
+                message = f"Saved at: {path}" if self.alert_on_success else None
+            except Exception as e:
+                message = f"Couldn't save at: {path} ({e})"
+                print(message)
+
+            with self.lock:
+                if message is not None:
+                    self.messages.append(message)
+                self.current_path = None
+            self.paths.task_done()
+
+    def gui(self) -> None:
+        num_pending = self.num_pending
+        if num_pending > 0:
+            psim.Text(f"Saving {num_pending} file(s)...")
+
+        with self.lock:
+            messages, self.messages = self.messages, []
+        if self.alert_handler is not None and len(messages) > 0:
+            self.alert_handler.trigger("\n".join(messages))
@@ -0,0 +1,184 @@
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+import os
+
+import polyscope as ps
+
+from ps_utils.ui.image_utils import (
+    DEFAULT_MAX_PREVIEW_SIZE,
+    Thumbnail,
+    get_decode_pool,
+    load_preview,
+)
+
+DEFAULT_CACHE_BYTES = 256 * 1024**2
+DEFAULT_MAX_FREE_SLOTS = 32
+
+# (absolute path, mtime in ns)
+CacheKey = Tuple[str, int]
+# (name, image quantity)
+Slot = Tuple[str, Any]
+
+
+class ThumbnailCache:
+    """
+    LRU cache of thumbnails keyed by path and modification time.
+    Files are only opened in the background, where previews are decoded (see `Thumbnail.from_path`):
+    a thumbnail gets an image quantity once its preview is decoded (in `Thumbnail.poll`).
+    When the previews exceed `max_bytes`, the least recently used ones are evicted and their image
+    quantities are kept (up to `max_free_slots`) to be reused by previews of the same size:
+    their buffers are updated in place instead of registering new quantities.
+
+    NB: a thumbnail returned by `get` is only valid until it is evicted. Keep it around and check
+    that its path is still `in` the cache (no file access) before calling `get` again.
+    """
+
+    def __init__(
+        self,
+        name: str = "thumbnail_cache",
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        max_free_slots: int = DEFAULT_MAX_FREE_SLOTS,
+        max_preview_h: int = DEFAULT_MAX_PREVIEW_SIZE,
+        max_preview_w: int = DEFAULT_MAX_PREVIEW_SIZE,
+    ) -> None:
+        self.name = name
+        self.max_bytes = max_bytes
+        self.max_free_slots = max_free_slots
+        self.max_preview_h = max_preview_h
+        self.max_preview_w = max_preview_w
+
+        self.entries: "OrderedDict[CacheKey, Thumbnail]" = OrderedDict()
+        self.path_keys: Dict[str, CacheKey] = {}
+        # Unused image quantities indexed by preview size
+        self.free_slots: Dict[Tuple[int, int], List[Slot]] = defaultdict(list)
+        self.num_free_slots = 0
+        self.num_slots = 0
+        self.nbytes = 0
+
+        # Stats
+        self.num_hits = 0
+        self.num_misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, path: str) -> bool:
+        return os.path.abspath(path) in self.path_keys
+
+    @staticmethod
+    def preview_nbytes(preview_size: Tuple[int, int]) -> int:
+        # float32 RGBA
+        return preview_size[0] * preview_size[1] * 16
+
+    # ===============
+    # SLOTS
+    # ===============
+
+    def acquire_slot(self, thumbnail: Thumbnail) -> None:
+        """
+        Gives a decoded `thumbnail` an image quantity of its preview size (see `Thumbnail.poll`).
+        """
+        # Entries are accounted at the maximum preview size until decoded
+        self.nbytes += self.preview_nbytes(
+            thumbnail.preview_size
+        ) - self.preview_nbytes((self.max_preview_h, self.max_preview_w))
+
+        if len(self.free_slots[thumbnail.preview_size]) > 0:
+            # Reuse an existing quantity of the same size (the preview is uploaded by `poll`)
+            thumbnail.name, thumbnail.preview_quantity = self.free_slots[
+                thumbnail.preview_size
+            ].pop()
+            self.num_free_slots -= 1
+            return
+
+        thumbnail.name = f"{self.name}_{self.num_slots}"
+        self.num_slots += 1
+        thumbnail.preview_quantity = ps.add_color_alpha_image_quantity(
+            thumbnail.quantity_name, thumbnail.image_preview
+        )
+
+    def release_slot(self, thumbnail: Thumbnail) -> None:
+        if thumbnail.future is not None:
+            thumbnail.future.cancel()
+        thumbnail.future = None
+        thumbnail.image_preview = None
+        thumbnail.image = None
+        thumbnail.path = None
+        if thumbnail.preview_quantity is None:
+            return
+
+        if self.num_free_slots < self.max_free_slots:
+            self.free_slots[thumbnail.preview_size].append(
+                (thumbnail.name, thumbnail.preview_quantity)
+            )
+            self.num_free_slots += 1
+        else:
+            ps.remove_floating_quantity(thumbnail.quantity_name)
+        thumbnail.preview_quantity = None
+
+    # ===============
+    # CACHE
+    # ===============
+
+    def get(self, input_path: str, mtime_ns: Optional[int] = None) -> Thumbnail:
+        """
+        Returns the (possibly still loading) thumbnail of `input_path`.
+        Pass a known `mtime_ns` to skip the `os.stat` call (e.g., when calling it every frame).
+        """
+        path = os.path.abspath(input_path)
+        if mtime_ns is None:
+            mtime_ns = os.stat(path).st_mtime_ns
+        key = (path, mtime_ns)
+
+        if key in self.entries:
+            self.num_hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.num_misses += 1
+
+        # The file changed since it was cached
+        if path in self.path_keys:
+            self.evict(self.path_keys[path])
+
+        # The file is only opened by the decode pool
+        thumbnail = Thumbnail(
+            image=None,
+            image_preview=None,
+            preview_quantity=None,
+            preview_size=(self.max_preview_h, self.max_preview_w),
+            path=path,
+            future=get_decode_pool().submit(
+                load_preview,
+                path,
+                max_preview_h=self.max_preview_h,
+                max_preview_w=self.max_preview_w,
+            ),
+            on_decoded=self.acquire_slot,
+        )
+
+        self.entries[key] = thumbnail
+        self.path_keys[path] = key
+        self.nbytes += self.preview_nbytes(thumbnail.preview_size)
+        self.shrink()
+
+        return thumbnail
+
+    def evict(self, key: CacheKey) -> None:
+        thumbnail = self.entries.pop(key)
+        del self.path_keys[key[0]]
+        self.nbytes -= self.preview_nbytes(thumbnail.preview_size)
+        self.release_slot(thumbnail)
+
+    def shrink(self) -> None:
+        # Evict least recently used entries (but always keep the last one)
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            self.evict(next(iter(self.entries)))
+
+    def clear(self) -> None:
+        for key in list(self.entries):
+            self.evict(key)
+        for slots in self.free_slots.values():
+            for name, _ in slots:
+                ps.remove_floating_quantity(f"{name}_buffer")
+        self.free_slots.clear()
+        self.num_free_slots = 0
@@ -1,4 +1,6 @@
 from argparse import ArgumentParser, Namespace
+from typing import Any, Dict, Optional
+import os
 import time
 
 
@@ -6,6 +8,14 @@ import polyscope as ps
 import polyscope.imgui as psim
 
 from ps_utils.ui.key_handler import KEY_HANDLER
+from ps_utils.viewer.profiler import FrameProfiler
+from ps_utils.viewer.recorder import FrameRecorder
+from ps_utils.viewer.scheduler import StepScheduler
+from ps_utils.viewer.step_worker import StepWorker
+
+# Headless mode
+DEFAULT_NUM_FRAMES = 100
+DEFAULT_CAPTURE_DIR = "captures"
 
 
 class BaseViewer:
@@ -13,6 +23,16 @@ class BaseViewer:
     Default viewer template with basic abstractions
     """
 
+    # Set to True (e.g., in `pre_init`) to call `step()` in a background thread.
+    # `draw()` should then only rely on `self.latest_snapshot` (see `snapshot()`).
+    async_step: bool = False
+    # Set to True to show the timings of `self.profiler` in the default GUI
+    show_profiler: bool = False
+    # Set to True to control `self.scheduler` from the default GUI
+    show_scheduler: bool = False
+    # Set to True to control `self.recorder` from the default GUI
+    show_recorder: bool = False
+
     # ===============
     # INITIALIZATION
     # ===============
@@ -37,17 +57,39 @@ class BaseViewer:
     # 3. `draw()`
     # ===============
 
-    def step(self) -> None:
+    def step(self) -> Optional[bool]:
         """
-        Called every frame. Use this for training/optimization/etc steps.
+        Called every frame (possibly several times, see `self.scheduler`).
+        Use this for training/optimization/etc steps.
+        Return False when there was nothing to do (e.g., training is over).
+        With `async_step`, called in a loop from a worker thread instead
+        and returning False pauses the worker.
         """
         pass
 
+    def snapshot(self) -> Any:
+        """
+        Only used with `async_step`. Called from the worker thread after `step()`.
+        Return what `draw()` needs: it is published as `self.latest_snapshot`.
+        """
+        return None
+
     def gui(self) -> None:
         """
         Use this for GUI.
         """
-        psim.Text(f"fps: {self.fps:.4f};")
+        steps_per_second = (
+            self.scheduler.steps_per_second
+            if self.step_worker is None
+            else self.step_worker.steps_per_second
+        )
+        psim.Text(f"fps: {self.fps:.4f}; steps/s: {steps_per_second:.1f}")
+        if self.show_scheduler and self.step_worker is None:
+            self.scheduler.gui()
+        if self.show_profiler:
+            self.profiler.gui()
+        if self.show_recorder:
+            self.recorder.gui()
 
     def draw(self) -> None:
         """
@@ -66,12 +108,40 @@ class BaseViewer:
         """
         pass
 
+    def headless_done(self) -> bool:
+        """
+        Only used in headless mode. Return True to stop before `num_frames` frames.
+        """
+        return False
+
     # ================================================
     # IMPLEMENTATION
     # You don't need to look at that in principle ;)
     # ================================================
 
-    def __init__(self, **kwargs) -> None:
+    def __init__(
+        self,
+        headless: bool = False,  # Run `num_frames` frames without the interactive loop
+        num_frames: int = DEFAULT_NUM_FRAMES,
+        capture_every: int = 0,  # Save a screenshot every N frames in headless mode (0: never)
+        capture_dir: str = DEFAULT_CAPTURE_DIR,
+        **kwargs,
+    ) -> None:
+        self.headless = headless
+        self.num_frames = num_frames
+        self.capture_every = capture_every
+        self.capture_dir = capture_dir
+
+        # Per-phase timings. Use `with self.profiler.scope(...)` to time nested scopes
+        # (in headless mode, the timings of all frames are kept)
+        self.profiler = (
+            FrameProfiler(window_size=num_frames) if headless else FrameProfiler()
+        )
+        # Number of steps per frame and redraw cadence.
+        # Call `self.scheduler.request_redraw()` when `draw()` must run regardless of steps
+        self.scheduler = StepScheduler()
+        # Records frames in the background (call `self.recorder.start()`/`stop()` or see `show_recorder`)
+        self.recorder = FrameRecorder()
 
         self.pre_init(**kwargs)
 
@@ -79,8 +149,14 @@ class BaseViewer:
         # Init polyscope
         # -----------------------
 
+        if self.headless:
+            # Fallback to EGL on machines without a display
+            ps.set_allow_headless_backends(True)
         ps.init()
         self.ps_init()
+        if self.headless:
+            # Don't cap the frame rate
+            ps.set_max_fps(-1)
 
         # -----------------------
         # Init components
@@ -88,13 +164,31 @@ class BaseViewer:
 
         self.post_init(**kwargs)
 
+        # -----------------------
+        # Start the step worker
+        # -----------------------
+
+        self.latest_snapshot = None
+        self.snapshot_updated = False
+        self.step_worker = None
+        if self.async_step:
+            self.step_worker = StepWorker(self.step, self.snapshot)
+            self.step_worker.start()
+
         # -----------------------
         # Start polyscope
         # -----------------------
 
         ps.set_user_callback(self.ps_callback)
         ps.set_drop_callback(self.ps_drop_callback)
-        ps.show()
+        if self.headless:
+            self.run_headless()
+        else:
+            ps.show()
+
+        if self.step_worker is not None:
+            self.step_worker.stop()
+        self.recorder.stop()
 
     def ps_init(self) -> None:
         """
@@ -119,14 +213,101 @@ class BaseViewer:
         self.fps = 1.0 / (new_time - self.last_time)
         self.last_time = new_time
 
+        self.profiler.begin_frame()
+
         # Step anything that needs to (e.g., trainer, optimizer)
-        self.step()
+        # or fetch the latest snapshot of the step worker
+        with self.profiler.scope("step"):
+            if self.step_worker is None:
+                redraw = self.scheduler.run(self.step)
+            else:
+                redraw = True
+                self.snapshot_updated, self.latest_snapshot = (
+                    self.step_worker.snapshots.consume()
+                )
 
         # Display gui components
-        self.gui()
+        with self.profiler.scope("gui"):
+            self.gui()
 
         # Draw things, including buffer updates
-        self.draw()
+        if redraw:
+            with self.profiler.scope("draw"):
+                self.draw()
+
+        # Copy the frame to the recorder
+        if self.recorder.recording:
+            with self.profiler.scope("record"):
+                self.recorder.capture()
 
         # Step the global KeyHandler
-        KEY_HANDLER.step()
+        with self.profiler.scope("key_handler"):
+            KEY_HANDLER.step()
+
+        self.profiler.end_frame()
+
+    def run_headless(self) -> None:
+        """
+        Drives `num_frames` frames (or until `headless_done()`) with `ps.frame_tick()`,
+        saves screenshots every `capture_every` frames and prints timing statistics.
+        """
+        if self.capture_every > 0:
+            os.makedirs(self.capture_dir, exist_ok=True)
+
+        capture_time = 0.0
+        num_captures = 0
+        start = time.perf_counter()
+        i_frame = 0
+        while i_frame < self.num_frames and not self.headless_done():
+            ps.frame_tick()
+
+            if self.capture_every > 0 and i_frame % self.capture_every == 0:
+                capture_start = time.perf_counter()
+                ps.screenshot(
+                    os.path.join(self.capture_dir, f"frame_{i_frame:06d}.png"),
+                    transparent_bg=False,
+                )
+                capture_time += time.perf_counter() - capture_start
+                num_captures += 1
+
+            i_frame += 1
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"Headless: {i_frame} frames in {elapsed:.2f}s ({i_frame / max(elapsed, 1e-9):.1f} fps)"
+        )
+        if num_captures > 0:
+            print(
+                f"Captures: {num_captures} in {capture_time:.2f}s, saved at: {self.capture_dir}"
+            )
+        print("scope: mean / p50 / p95 / p99 (ms)")
+        for name, stats in self.profiler.summary().items():
+            print(
+                f"{name}: {stats['mean']:.2f} / {stats['p50']:.2f} / {stats['p95']:.2f} / {stats['p99']:.2f}"
+            )
+        if self.capture_every > 0:
+            self.profiler.export_json(os.path.join(self.capture_dir, "timings.json"))
+
+
+# ===============
+# CLI
+# ===============
+
+
+def add_headless_args(parser: ArgumentParser) -> None:
+    """
+    Adds the headless options of `BaseViewer` to an argument parser.
+    """
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--num_frames", type=int, default=DEFAULT_NUM_FRAMES)
+    parser.add_argument("--capture_every", type=int, default=0)
+    parser.add_argument("--capture_dir", type=str, default=DEFAULT_CAPTURE_DIR)
+
+
+def headless_kwargs(args: Namespace) -> Dict[str, Any]:
+    return {
+        "headless": args.headless,
+        "num_frames": args.num_frames,
+        "capture_every": args.capture_every,
+        "capture_dir": args.capture_dir,
+    }
@@ -0,0 +1,168 @@
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List
+import csv
+import json
+import time
+
+import numpy as np
+import polyscope.imgui as psim
+
+from ps_utils.ui.buttons import save_popup
+
+DEFAULT_WINDOW_SIZE = 300  # Number of frames kept for statistics
+DEFAULT_NUM_BINS = 20  # Frame time histogram bins
+PERCENTILES = (50, 95, 99)
+
+# Name of the scope measuring the time between two frames
+FRAME_SCOPE = "frame"
+
+
+class FrameProfiler:
+    """
+    Collects per-frame timings of named scopes with `time.perf_counter_ns`.
+    Use `with profiler.scope("name"): ...` to time a block. Scopes can be nested
+    and are identified by their path (e.g., "draw/render").
+    Statistics are computed over a rolling window of the last `window_size` frames.
+    Call `begin_frame()` at the beginning of every frame and `end_frame()` at the end.
+    """
+
+    def __init__(self, window_size: int = DEFAULT_WINDOW_SIZE) -> None:
+        self.enabled = True
+        self.frames: Deque[Dict[str, float]] = deque(maxlen=window_size)
+        self.stack: List[str] = []
+        self.current: Dict[str, int] = defaultdict(int)
+        self.last_frame_start = None
+        self.export_path = "profiler_timings.csv"
+
+    # ===============
+    # MEASUREMENTS
+    # ===============
+
+    @contextmanager
+    def scope(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        self.stack.append(name)
+        path = "/".join(self.stack)
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.current[path] += time.perf_counter_ns() - start
+            self.stack.pop()
+
+    def begin_frame(self) -> None:
+        frame_start = time.perf_counter_ns()
+        if self.enabled and self.last_frame_start is not None:
+            self.current[FRAME_SCOPE] = frame_start - self.last_frame_start
+        self.last_frame_start = frame_start
+
+    def end_frame(self) -> None:
+        if self.enabled and len(self.current) > 0:
+            # Store timings in ms
+            self.frames.append({k: 1e-6 * v for k, v in self.current.items()})
+        self.current = defaultdict(int)
+
+    # ===============
+    # STATISTICS
+    # ===============
+
+    def scope_names(self) -> List[str]:
+        names = {}
+        for frame in self.frames:
+            names.update(dict.fromkeys(frame))
+        return list(names)
+
+    def values(self, name: str) -> np.ndarray:
+        return np.array(
+            [frame[name] for frame in self.frames if name in frame], dtype=np.float32
+        )
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the mean and percentiles (in ms) of every scope over the rolling window.
+        """
+        summary = {}
+        for name in self.scope_names():
+            values = self.values(name)
+            summary[name] = {"mean": float(values.mean())}
+            for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+                summary[name][f"p{p}"] = float(v)
+        return summary
+
+    # ===============
+    # EXPORT
+    # ===============
+
+    def export_csv(self, path: str) -> None:
+        """
+        Writes one row per frame and one column per scope (in ms).
+        """
+        names = self.scope_names()
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            for frame in self.frames:
+                writer.writerow([frame.get(name, "") for name in names])
+
+    def export_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "summary": self.summary(),
+                    "frames": list(self.frames),
+                },
+                f,
+                indent=2,
+            )
+
+    def export(self, path: str) -> None:
+        if path.endswith(".json"):
+            self.export_json(path)
+        else:
+            self.export_csv(path)
+
+    # ===============
+    # GUI
+    # ===============
+
+    def gui(self) -> None:
+        if not psim.TreeNode("Profiler##profiler"):
+            return
+
+        _, self.enabled = psim.Checkbox("Enabled##profiler", self.enabled)
+
+        frame_times = self.values(FRAME_SCOPE)
+        if len(frame_times) > 0:
+            psim.PlotLines(
+                "Frame (ms)##profiler",
+                frame_times.tolist(),
+                graph_size=(0, 60),
+            )
+            counts, edges = np.histogram(frame_times, bins=DEFAULT_NUM_BINS)
+            psim.PlotHistogram(
+                "Histogram##profiler",
+                counts.astype(np.float32).tolist(),
+                overlay_text=f"{edges[0]:.1f} - {edges[-1]:.1f} ms",
+                graph_size=(0, 60),
+            )
+
+        psim.Text("scope: mean / p50 / p95 / p99 (ms)")
+        for name, stats in self.summary().items():
+            psim.Text(
+                f"{name}: {stats['mean']:.2f} / {stats['p50']:.2f} / {stats['p95']:.2f} / {stats['p99']:.2f}"
+            )
+
+        requested, self.export_path = save_popup(
+            "profiler_export", self.export_path, save_label="Export (.csv/.json)"
+        )
+        if requested:
+            try:
+                self.export(self.export_path)
+            except Exception as e:
+                print(f"Couldn't export timings at: {self.export_path}")
+
+        psim.TreePop()
@@ -0,0 +1,290 @@
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from queue import Empty, Queue
+from typing import List, Optional
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+import polyscope as ps
+import polyscope.imgui as psim
+
+from ps_utils.ui import get_enum_maps, choice_combo, state_button
+
+
+class RecordFormat(Enum):
+    PNG = "png"
+    JPG = "jpg"
+    RAW = "raw"  # All frames appended to a single uint8 file
+
+
+RECORD_FORMAT_MAP, RECORD_FORMAT_INVMAP, RECORD_FORMAT_NAMES, _ = get_enum_maps(
+    RecordFormat
+)
+
+
+class Backpressure(Enum):
+    DROP = "drop"  # Skip frames while all buffers are in use
+    BLOCK = "block"  # Wait for a free buffer (changes the timing of the viewer!)
+    DECIMATE = "decimate"  # Halve the capture rate while all buffers are in use
+
+
+BACKPRESSURE_MAP, BACKPRESSURE_INVMAP, BACKPRESSURE_NAMES, _ = get_enum_maps(
+    Backpressure
+)
+
+DEFAULT_RECORD_DIR = "recordings"
+DEFAULT_NUM_BUFFERS = 8
+DEFAULT_NUM_WORKERS = 2
+DEFAULT_JPG_QUALITY = 90
+MAX_DECIMATION = 64
+
+
+class FrameRecorder:
+    """
+    Records frames without encoding them in the render loop.
+    `capture()` copies the frame into a ring of `num_buffers` preallocated buffers and
+    a pool of `num_workers` threads encodes them to disk (PIL and file writes release the GIL).
+    When all buffers are in use, frames are dropped, waited for or decimated depending on `backpressure`:
+    a buffer is acquired before reading the frame back, so skipped frames cost nothing.
+
+    NB: the readback itself is synchronous. `ps.screenshot_to_buffer` renders the view again and
+    returns a new array (polyscope can't read back into a given array), which is then copied into
+    the ring. Its average cost is tracked as `readback_time` (shown in `gui()` and printed by `stop()`).
+
+    Every recording is saved in a new `record_dir/take_XXX` folder.
+    With `RecordFormat.RAW`, frames are written at their offset in `frames_{W}x{H}x{C}.raw`,
+    which can be loaded with `np.memmap(path, dtype=np.uint8).reshape(-1, H, W, C)`.
+    """
+
+    def __init__(
+        self,
+        record_dir: str = DEFAULT_RECORD_DIR,
+        record_format: RecordFormat = RecordFormat.PNG,
+        backpressure: Backpressure = Backpressure.DROP,
+        num_buffers: int = DEFAULT_NUM_BUFFERS,
+        num_workers: int = DEFAULT_NUM_WORKERS,
+        jpg_quality: int = DEFAULT_JPG_QUALITY,
+    ) -> None:
+        self.record_dir = record_dir
+        self.record_format = record_format
+        self.backpressure = backpressure
+        self.num_buffers = num_buffers
+        self.num_workers = num_workers
+        self.jpg_quality = jpg_quality
+
+        self.recording = False
+        self.buffers: List[np.ndarray] = []
+        self.free_buffers: Queue = Queue()
+        self.pool = None
+        self.raw_fd = None
+        self.take_dir = None
+
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.num_frames = 0  # Frames passed to `capture()`
+        self.num_recorded = 0
+        self.num_dropped = 0
+        self.decimation = 1
+        # Average time (in s) to read a frame back and copy it into the ring
+        self.readback_time = 0.0
+
+    # ===============
+    # CONTROL
+    # ===============
+
+    def start(self) -> None:
+        # Every recording goes to a new `take_XXX` folder
+        os.makedirs(self.record_dir, exist_ok=True)
+        i_take = 0
+        while os.path.exists(os.path.join(self.record_dir, f"take_{i_take:03d}")):
+            i_take += 1
+        self.take_dir = os.path.join(self.record_dir, f"take_{i_take:03d}")
+        os.makedirs(self.take_dir)
+
+        self.reset_stats()
+        self.buffers = []
+        self.pool = ThreadPoolExecutor(max_workers=self.num_workers)
+        self.recording = True
+
+    def stop(self) -> None:
+        """
+        Stops recording and waits for pending frames to be written.
+        """
+        if not self.recording:
+            return
+        self.recording = False
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+        self.close_raw()
+        print(
+            f"Recorded {self.num_recorded} frames at: {self.take_dir} ({self.num_dropped} dropped, "
+            f"readback: {1e3 * self.readback_time:.2f} ms/frame)"
+        )
+
+    def close_raw(self) -> None:
+        if self.raw_fd is not None:
+            os.close(self.raw_fd)
+            self.raw_fd = None
+
+    @property
+    def num_pending(self) -> int:
+        return len(self.buffers) - self.free_buffers.qsize()
+
+    def allocate(self, shape) -> None:
+        # Wait for pending frames before reallocating (e.g., the window was resized)
+        for _ in range(len(self.buffers)):
+            self.free_buffers.get()
+        self.buffers = [
+            np.empty(shape, dtype=np.uint8) for _ in range(self.num_buffers)
+        ]
+        self.free_buffers = Queue()
+        for i in range(self.num_buffers):
+            self.free_buffers.put(i)
+
+        # Raw frames have a fixed size: start a new file
+        self.close_raw()
+        self.num_raw_frames = 0
+        if self.record_format == RecordFormat.RAW:
+            path = os.path.join(
+                self.take_dir, f"frames_{shape[1]}x{shape[0]}x{shape[2]}.raw"
+            )
+            self.raw_fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+
+    # ===============
+    # CAPTURE
+    # ===============
+
+    def acquire(self) -> Optional[int]:
+        if self.backpressure == Backpressure.BLOCK:
+            return self.free_buffers.get()
+
+        try:
+            buffer_id = self.free_buffers.get_nowait()
+        except Empty:
+            self.num_dropped += 1
+            if self.backpressure == Backpressure.DECIMATE:
+                self.decimation = min(2 * self.decimation, MAX_DECIMATION)
+            return None
+
+        # Recover the capture rate once encoders caught up
+        if (
+            self.backpressure == Backpressure.DECIMATE
+            and self.decimation > 1
+            and self.free_buffers.qsize() == len(self.buffers) - 1
+        ):
+            self.decimation //= 2
+        return buffer_id
+
+    def capture(self, frame: Optional[np.ndarray] = None) -> None:
+        """
+        Records `frame` (uint8 HxWx3/4) or, by default, a screenshot of the current view.
+        """
+        if not self.recording:
+            return
+
+        i_frame = self.num_frames
+        self.num_frames += 1
+        if i_frame % self.decimation != 0:
+            return
+
+        if frame is None:
+            # NB: the buffer size of the window, see `ps.screenshot_to_buffer`
+            width, height = ps.get_buffer_size()
+            shape = (height, width, 4)
+        else:
+            shape = frame.shape
+        if len(self.buffers) == 0 or self.buffers[0].shape != shape:
+            self.allocate(shape)
+
+        # Skipped frames are never read back
+        buffer_id = self.acquire()
+        if buffer_id is None:
+            return
+
+        start = time.perf_counter()
+        if frame is None:
+            frame = ps.screenshot_to_buffer(transparent_bg=False)
+            if frame.shape != shape:
+                # E.g., the window was resized since `get_buffer_size`
+                self.free_buffers.put(buffer_id)
+                self.allocate(frame.shape)
+                buffer_id = self.free_buffers.get()
+        np.copyto(self.buffers[buffer_id], frame)
+        self.num_recorded += 1
+        self.readback_time += (
+            time.perf_counter() - start - self.readback_time
+        ) / self.num_recorded
+
+        if self.record_format == RecordFormat.RAW:
+            # Frames are contiguous in the raw file, whatever the order they are written in
+            target = self.num_raw_frames
+            self.num_raw_frames += 1
+        else:
+            target = i_frame
+        self.pool.submit(self.encode, buffer_id, target)
+
+    def encode(self, buffer_id: int, target: int) -> None:
+        frame = self.buffers[buffer_id]
+        try:
+            if self.record_format == RecordFormat.RAW:
+                os.pwrite(self.raw_fd, frame.tobytes(), target * frame.nbytes)
+            else:
+                path = os.path.join(
+                    self.take_dir,
+                    f"frame_{target:06d}.{self.record_format.value}",
+                )
+                image = Image.fromarray(frame)
+                if self.record_format == RecordFormat.JPG:
+                    image.convert("RGB").save(path, quality=self.jpg_quality)
+                else:
+                    image.save(path, compress_level=1)
+        except Exception as e:
+            print(f"Couldn't record frame {target}: {e!r}")
+        finally:
+            self.free_buffers.put(buffer_id)
+
+    # ===============
+    # GUI
+    # ===============
+
+    def gui(self) -> None:
+        if not psim.TreeNode("Recorder##recorder"):
+            return
+
+        if not self.recording:
+            _, self.record_dir = psim.InputText("Folder##recorder", self.record_dir)
+            _, self.record_format = choice_combo(
+                "Format##recorder",
+                self.record_format,
+                RECORD_FORMAT_MAP,
+                RECORD_FORMAT_INVMAP,
+                RECORD_FORMAT_NAMES,
+            )
+        _, self.backpressure = choice_combo(
+            "Backpressure##recorder",
+            self.backpressure,
+            BACKPRESSURE_MAP,
+            BACKPRESSURE_INVMAP,
+            BACKPRESSURE_NAMES,
+        )
+
+        clicked, recording = state_button(self.recording, "Stop", "Record")
+        if clicked:
+            if recording:
+                self.start()
+            else:
+                self.stop()
+
+        psim.Text(
+            f"Recorded: {self.num_recorded}; dropped: {self.num_dropped}; pending: {self.num_pending}"
+        )
+        psim.Text(f"Readback: {1e3 * self.readback_time:.2f} ms/frame")
+        if self.backpressure == Backpressure.DECIMATE:
+            psim.Text(f"Decimation: 1/{self.decimation}")
+
+        psim.TreePop()
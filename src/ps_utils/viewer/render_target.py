@@ -0,0 +1,96 @@
+from typing import Any, Optional
+
+import numpy as np
+import polyscope as ps
+import polyscope.imgui as psim
+
+
+class RenderTarget:
+    """
+    Raw color/alpha render image quantity backed by a persistent RGBA float32 storage.
+    Write into `colors` (H x W x 4) or `rgb` (H x W x 3 view) in place, then call `upload()`:
+    nothing is allocated per frame.
+
+    By default, the storage is a numpy array uploaded with `update_data_from_host`.
+    With a torch `device`, it is a tensor on that device: "cpu" tensors share their memory with
+    the uploaded numpy view and other devices are uploaded with `update_data_from_device`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        height: int,
+        width: int,
+        device: Optional[str] = None,
+        enabled: bool = True,
+        allow_fullscreen_compositing: bool = True,
+    ) -> None:
+        self.name = name
+        self.height = height
+        self.width = width
+        self.device = device
+
+        self.quantity = ps.add_raw_color_alpha_render_image_quantity(
+            name,
+            np.ones((height, width), dtype=np.float32),
+            np.ones((height, width, 4), dtype=np.float32),
+            enabled=enabled,
+            allow_fullscreen_compositing=allow_fullscreen_compositing,
+        )
+        self.buffer = ps.get_quantity_buffer(name, "colors")
+
+        if device is None:
+            self.colors: Any = np.ones((height, width, 4), dtype=np.float32)
+            self.host_colors = self.colors.reshape(-1, 4)
+        else:
+            import torch
+
+            self.colors = torch.ones(
+                (height, width, 4), dtype=torch.float32, device=device
+            )
+            # Zero-copy numpy view for host uploads
+            self.host_colors = (
+                self.colors.numpy().reshape(-1, 4) if device == "cpu" else None
+            )
+
+        # Stats
+        self.num_uploads = 0
+        self.nbytes_uploaded = 0
+        self.nbytes_last_upload = 0
+
+    @property
+    def rgb(self) -> Any:
+        return self.colors[..., :3]
+
+    @property
+    def alpha(self) -> Any:
+        return self.colors[..., 3]
+
+    @property
+    def nbytes(self) -> int:
+        return self.height * self.width * 4 * 4
+
+    def upload(self) -> None:
+        if self.host_colors is not None:
+            self.buffer.update_data_from_host(self.host_colors)
+        else:
+            self.buffer.update_data_from_device(self.colors)
+
+        self.num_uploads += 1
+        self.nbytes_last_upload = self.nbytes
+        self.nbytes_uploaded += self.nbytes
+
+    def write_rgb(self, rgb: Any) -> None:
+        """
+        Copies `rgb` (H x W x 3, same kind as the storage) into the storage and uploads it.
+        """
+        if self.device is None:
+            np.copyto(self.rgb, rgb)
+        else:
+            self.rgb.copy_(rgb)
+        self.upload()
+
+    def gui(self) -> None:
+        psim.Text(
+            f"Render target: {1e-6 * self.nbytes_last_upload:.2f} MB/upload ({self.num_uploads} uploads)"
+        )
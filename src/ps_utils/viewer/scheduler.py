@@ -0,0 +1,160 @@
+from enum import Enum
+from typing import Callable, Optional
+import time
+
+import polyscope.imgui as psim
+
+from ps_utils.ui import get_enum_maps, choice_combo
+
+
+class ScheduleMode(Enum):
+    SINGLE = "single"  # One step per frame
+    FIXED = "fixed"  # `steps_per_frame` steps per frame
+    BUDGET = "budget"  # As many steps as fit in `budget_ms`
+    ADAPTIVE = "adaptive"  # Budget adapted to keep `target_frame_ms`
+
+
+SCHEDULE_MODE_MAP, SCHEDULE_MODE_INVMAP, SCHEDULE_MODE_NAMES, _ = get_enum_maps(
+    ScheduleMode
+)
+
+DEFAULT_BUDGET_MS = 8.0
+DEFAULT_TARGET_FRAME_MS = 1000.0 / 60.0
+MIN_BUDGET_MS = 0.5
+ADAPTIVE_GAIN = 0.1  # Fraction of the frame time error corrected every frame
+
+# Interval used to measure the step rate
+RATE_INTERVAL = 1.0  # seconds
+
+
+class StepScheduler:
+    """
+    Decides how many times `step()` is called every frame and whether `draw()` should follow.
+    Steps returning False are considered idle: they end the frame's steps and don't count as a state change.
+    `draw()` is requested every `redraw_every` (non-idle) steps or after `request_redraw()`.
+    """
+
+    def __init__(
+        self,
+        mode: ScheduleMode = ScheduleMode.SINGLE,
+        steps_per_frame: int = 1,
+        budget_ms: float = DEFAULT_BUDGET_MS,
+        target_frame_ms: float = DEFAULT_TARGET_FRAME_MS,
+        redraw_every: int = 1,
+    ) -> None:
+        self.mode = mode
+        self.steps_per_frame = steps_per_frame
+        self.budget_ms = budget_ms
+        self.target_frame_ms = target_frame_ms
+        self.redraw_every = redraw_every
+
+        self.steps_since_draw = 0
+        self.redraw_requested = True
+        self.last_frame_start = None
+        self.last_step_ms = 0.0
+
+        # Stats
+        self.steps_last_frame = 0
+        self.steps_per_second = 0.0
+        self.rate_start = time.perf_counter()
+        self.rate_steps = 0
+
+    def request_redraw(self) -> None:
+        self.redraw_requested = True
+
+    def adapt_budget(self, frame_start: float) -> None:
+        if self.last_frame_start is not None:
+            frame_ms = 1e3 * (frame_start - self.last_frame_start)
+            self.budget_ms += ADAPTIVE_GAIN * (self.target_frame_ms - frame_ms)
+            self.budget_ms = min(
+                max(self.budget_ms, MIN_BUDGET_MS), self.target_frame_ms
+            )
+        self.last_frame_start = frame_start
+
+    def keep_stepping(self, num_steps: int, elapsed_ms: float) -> bool:
+        if self.mode == ScheduleMode.SINGLE:
+            return num_steps < 1
+        elif self.mode == ScheduleMode.FIXED:
+            return num_steps < self.steps_per_frame
+        else:
+            # Always step at least once and stop before overshooting the budget
+            return num_steps < 1 or elapsed_ms + self.last_step_ms <= self.budget_ms
+
+    def run(self, step_fn: Callable[[], Optional[bool]]) -> bool:
+        """
+        Runs the steps of the current frame and returns whether `draw()` should be called.
+        """
+        frame_start = time.perf_counter()
+        if self.mode == ScheduleMode.ADAPTIVE:
+            self.adapt_budget(frame_start)
+
+        num_steps = 0
+        step_start = frame_start
+        while self.keep_stepping(num_steps, 1e3 * (step_start - frame_start)):
+            idle = step_fn() is False
+            step_end = time.perf_counter()
+            self.last_step_ms = 1e3 * (step_end - step_start)
+            step_start = step_end
+            if idle:
+                break
+            num_steps += 1
+
+        # Measure the step rate
+        self.steps_last_frame = num_steps
+        self.rate_steps += num_steps
+        if step_start - self.rate_start > RATE_INTERVAL:
+            self.steps_per_second = self.rate_steps / (step_start - self.rate_start)
+            self.rate_start, self.rate_steps = step_start, 0
+
+        self.steps_since_draw += num_steps
+        redraw = self.redraw_requested or self.steps_since_draw >= self.redraw_every
+        if redraw:
+            self.steps_since_draw = 0
+            self.redraw_requested = False
+        return redraw
+
+    # ===============
+    # GUI
+    # ===============
+
+    def gui(self) -> None:
+        if not psim.TreeNode("Scheduler##scheduler"):
+            return
+
+        _, self.mode = choice_combo(
+            "Mode##scheduler",
+            self.mode,
+            SCHEDULE_MODE_MAP,
+            SCHEDULE_MODE_INVMAP,
+            SCHEDULE_MODE_NAMES,
+        )
+
+        if self.mode == ScheduleMode.FIXED:
+            _, self.steps_per_frame = psim.InputInt(
+                "Steps per frame##scheduler", self.steps_per_frame
+            )
+            self.steps_per_frame = max(1, self.steps_per_frame)
+        elif self.mode == ScheduleMode.BUDGET:
+            _, self.budget_ms = psim.SliderFloat(
+                "Budget (ms)##scheduler",
+                self.budget_ms,
+                v_min=MIN_BUDGET_MS,
+                v_max=100.0,
+            )
+        elif self.mode == ScheduleMode.ADAPTIVE:
+            _, self.target_frame_ms = psim.SliderFloat(
+                "Target frame (ms)##scheduler",
+                self.target_frame_ms,
+                v_min=1.0,
+                v_max=100.0,
+            )
+            psim.Text(f"Budget: {self.budget_ms:.2f} ms")
+
+        _, self.redraw_every = psim.InputInt(
+            "Redraw every##scheduler", self.redraw_every
+        )
+        self.redraw_every = max(1, self.redraw_every)
+
+        psim.Text(f"Steps last frame: {self.steps_last_frame}")
+
+        psim.TreePop()
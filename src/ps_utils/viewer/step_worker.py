@@ -0,0 +1,156 @@
+from typing import Any, Callable, Optional, Tuple
+import threading
+import time
+
+# Interval used to measure the step rate
+RATE_INTERVAL = 1.0  # seconds
+
+
+class SnapshotBuffer:
+    """
+    Double-buffered, lock-protected snapshot.
+    A producer (e.g., a worker thread) calls `publish(...)` and the render thread calls `consume()`
+    to get the latest published snapshot. Intermediate snapshots are dropped.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.back = None
+        self.front = None
+        self.version = 0
+        self.consumed_version = 0
+
+    def publish(self, snapshot: Any) -> None:
+        with self.lock:
+            self.back = snapshot
+            self.version += 1
+
+    def consume(self) -> Tuple[bool, Any]:
+        """
+        Returns `updated, snapshot` where `updated` is True if a new snapshot was published since the last call.
+        """
+        with self.lock:
+            updated = self.version != self.consumed_version
+            if updated:
+                self.front, self.back = self.back, None
+                self.consumed_version = self.version
+            return updated, self.front
+
+    def clear(self) -> None:
+        with self.lock:
+            self.back = None
+            self.front = None
+            self.consumed_version = self.version
+
+
+class StepWorker:
+    """
+    Calls `step_fn` in a background thread, as fast as possible or at most `max_rate` steps per second.
+    After every `publish_every` steps, `snapshot_fn()` is published to `snapshots`.
+    If `step_fn` returns False, the worker pauses itself (e.g., when training is over).
+
+    `pause()` returns once the step in flight is done. `reset(fn)` runs `fn` in the calling thread
+    while no step is running, clears snapshots and restores the previous running state.
+    """
+
+    def __init__(
+        self,
+        step_fn: Callable[[], Optional[bool]],
+        snapshot_fn: Callable[[], Any],
+        max_rate: Optional[float] = None,
+        publish_every: int = 1,
+    ) -> None:
+        self.step_fn = step_fn
+        self.snapshot_fn = snapshot_fn
+        self.max_rate = max_rate
+        self.publish_every = publish_every
+
+        self.snapshots = SnapshotBuffer()
+        self.num_steps = 0
+        self.steps_per_second = 0.0
+        self.error = None
+
+        # Held while a step is running
+        self.step_lock = threading.Lock()
+        self.running = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    # ===============
+    # CONTROL
+    # ===============
+
+    def start(self, paused: bool = False) -> None:
+        if not paused:
+            self.running.set()
+        self.thread.start()
+
+    def pause(self) -> None:
+        self.running.clear()
+        # Wait for the step in flight
+        with self.step_lock:
+            pass
+
+    def resume(self) -> None:
+        self.error = None
+        self.running.set()
+
+    def reset(self, reset_fn: Optional[Callable[[], None]] = None) -> None:
+        was_running = self.is_running
+        self.running.clear()
+        with self.step_lock:
+            if reset_fn is not None:
+                reset_fn()
+            self.snapshots.clear()
+            self.num_steps = 0
+        if was_running:
+            self.running.set()
+
+    def stop(self) -> None:
+        self.stopped = True
+        self.running.set()
+        self.thread.join()
+
+    @property
+    def is_running(self) -> bool:
+        return self.running.is_set()
+
+    # ===============
+    # WORKER
+    # ===============
+
+    def run(self) -> None:
+        rate_start, rate_steps = time.perf_counter(), 0
+
+        while True:
+            self.running.wait()
+            if self.stopped:
+                return
+
+            step_start = time.perf_counter()
+            with self.step_lock:
+                # Paused while waiting for the lock
+                if not self.running.is_set():
+                    continue
+                try:
+                    keep_running = self.step_fn()
+                    self.num_steps += 1
+                    if self.num_steps % self.publish_every == 0:
+                        self.snapshots.publish(self.snapshot_fn())
+                except Exception as e:
+                    print(f"StepWorker: step failed with {e!r}, pausing")
+                    self.error = e
+                    keep_running = False
+
+            if keep_running is False:
+                self.running.clear()
+
+            # Measure the step rate
+            rate_steps += 1
+            now = time.perf_counter()
+            if now - rate_start > RATE_INTERVAL:
+                self.steps_per_second = rate_steps / (now - rate_start)
+                rate_start, rate_steps = now, 0
+
+            if self.max_rate is not None:
+                time.sleep(max(0.0, 1.0 / self.max_rate - (now - step_start)))